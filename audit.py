@@ -0,0 +1,693 @@
+"""Columnar consistency checks for the IPAM and MAC audits"""
+
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Fields each audit reads from each endpoint. Requesting only these with
+# ?fields= (NetBox 4.0+) keeps NetBox from serializing, and the client from
+# decoding, nested tenant, VRF, NAT and custom field blocks.
+IPAM_AUDIT_FIELDS = {
+    'dcim/interfaces/': ['id', 'name', 'mac_addresses'],
+    'ipam/ip-addresses/': ['id', 'address', 'assigned_object_id'],
+    'dcim/mac-addresses/': ['id', 'mac_address', 'assigned_object_id'],
+}
+MAC_AUDIT_FIELDS = {
+    'dcim/interfaces/': ['id', 'name', 'mac_addresses'],
+    'dcim/mac-addresses/': ['id', 'mac_address', 'assigned_object_id'],
+}
+
+
+def _field(obj: Any, name: str, default: Any = None) -> Any:
+    """Read a field from a Record, a pynetbox Record or a plain dictionary"""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _rows_by_key(keys: np.ndarray, wanted: np.ndarray) -> Dict[int, np.ndarray]:
+    """Group the indexes of rows whose key is in wanted by that key"""
+    rows = np.flatnonzero(np.isin(keys, wanted))
+    if not len(rows):
+        return {}
+    rows = rows[np.argsort(keys[rows], kind='stable')]
+    owners = keys[rows]
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    return {int(owners[start]): group for start, group in zip(starts, np.split(rows, starts[1:]))}
+
+
+class _Labels:
+    """Assign a dense integer code to each distinct string value"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value: Optional[str]) -> int:
+        """Return the code for value, adding it if it is new (None is -1)"""
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def _merge_labels(values: Iterable[str], other_values: Iterable[str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Combine the distinct strings of two tables
+
+    Returns:
+        The combined distinct strings (values first), and an array mapping
+        each code of other_values to its combined code; index -1 maps to -1
+    """
+    labels = _Labels()
+    for value in values:
+        labels.code(value)
+    mapping = [labels.code(value) for value in other_values] + [-1]
+    return labels.values, np.array(mapping, dtype=np.int32)
+
+
+def _kept_rows(ids: np.ndarray, changed_ids: np.ndarray, removed_ids: Iterable[int]) -> np.ndarray:
+    """Mask of the rows that are neither changed nor removed"""
+    dropped = np.union1d(changed_ids, np.asarray(list(removed_ids), dtype=np.int64))
+    return ~np.isin(ids, dropped)
+
+
+class AddressTable:
+    """Columnar view of IP or MAC address objects and their assignments
+
+    Every object is one row: ids and object_ids (the assigned interface, or
+    0 when unassigned) are int64 arrays, and value_codes indexes into values
+    (the distinct address strings) so repeated addresses are stored once.
+    """
+
+    def __init__(self, ids: np.ndarray, object_ids: np.ndarray,
+                 value_codes: np.ndarray, values: List[str]):
+        """
+        Initialize AddressTable from its columns
+
+        Args:
+            ids: Object IDs
+            object_ids: Assigned interface ID of each object (0 if unassigned)
+            value_codes: Index into values of each object's address
+            values: Distinct address strings
+        """
+        self.ids = ids
+        self.object_ids = object_ids
+        self.value_codes = value_codes
+        self.values = values
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_records(cls, records: Iterable, value_field: str) -> 'AddressTable':
+        """
+        Build a table from IP or MAC address objects
+
+        Args:
+            records: Objects from ipam/ip-addresses/ or dcim/mac-addresses/
+                (Record, pynetbox Record or dict); may be a generator
+            value_field: 'address' for IP addresses, 'mac_address' for MACs
+
+        Returns:
+            AddressTable with one row per object
+        """
+        ids = array('q')
+        object_ids = array('q')
+        value_codes = array('i')
+        labels = _Labels()
+        for record in records:
+            ids.append(_field(record, 'id'))
+            object_ids.append(_field(record, 'assigned_object_id') or 0)
+            value_codes.append(labels.code(_field(record, value_field)))
+        return cls(
+            np.frombuffer(ids, dtype=np.int64),
+            np.frombuffer(object_ids, dtype=np.int64),
+            np.frombuffer(value_codes, dtype=np.int32),
+            labels.values
+        )
+
+    @classmethod
+    def from_interfaces(cls, interfaces: Iterable, field: str, value_field: str) -> 'AddressTable':
+        """
+        Build a table from the addresses nested in interface objects
+
+        Every nested address becomes a row assigned to the interface it is
+        nested in, as returned by NetBoxAPI.get_device_interfaces().
+
+        Args:
+            interfaces: Interface objects (Record, pynetbox Record or dict)
+            field: 'ip_addresses' or 'mac_addresses'
+            value_field: 'address' for IP addresses, 'mac_address' for MACs
+
+        Returns:
+            AddressTable with one row per nested address
+        """
+        ids = array('q')
+        object_ids = array('q')
+        value_codes = array('i')
+        labels = _Labels()
+        for interface in interfaces:
+            interface_id = _field(interface, 'id')
+            for record in _field(interface, field) or []:
+                ids.append(_field(record, 'id'))
+                object_ids.append(interface_id)
+                value_codes.append(labels.code(_field(record, value_field)))
+        return cls(
+            np.frombuffer(ids, dtype=np.int64),
+            np.frombuffer(object_ids, dtype=np.int64),
+            np.frombuffer(value_codes, dtype=np.int32),
+            labels.values
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, Optional[int], Optional[str]]]) -> 'AddressTable':
+        """
+        Build a table from (id, assigned interface ID, address) tuples
+
+        Used for rows read straight from the database (see groundtruth.py),
+        which need no per-field lookups.
+
+        Args:
+            rows: Tuples with None for an unassigned object; may be a generator
+
+        Returns:
+            AddressTable with one row per tuple
+        """
+        ids = array('q')
+        object_ids = array('q')
+        value_codes = array('i')
+        labels = _Labels()
+        for object_id, assigned_id, value in rows:
+            ids.append(object_id)
+            object_ids.append(assigned_id or 0)
+            value_codes.append(labels.code(value))
+        return cls(
+            np.frombuffer(ids, dtype=np.int64),
+            np.frombuffer(object_ids, dtype=np.int64),
+            np.frombuffer(value_codes, dtype=np.int32),
+            labels.values
+        )
+
+    def updated(self, changes: 'AddressTable', removed_ids: Iterable[int]) -> 'AddressTable':
+        """
+        Apply changed and removed objects to the table
+
+        Args:
+            changes: Table of the objects created or changed since this
+                table was built; their rows replace any existing ones
+            removed_ids: IDs of objects that were deleted or left the scope
+                of the table
+
+        Returns:
+            New AddressTable with the unchanged rows followed by the rows of
+            changes
+        """
+        keep = _kept_rows(self.ids, changes.ids, removed_ids)
+        values, mapping = _merge_labels(self.values, changes.values)
+        return AddressTable(
+            np.concatenate([self.ids[keep], changes.ids]),
+            np.concatenate([self.object_ids[keep], changes.object_ids]),
+            np.concatenate([self.value_codes[keep], mapping[changes.value_codes]]),
+            values
+        )
+
+    def value(self, row: int) -> Optional[str]:
+        """Return the address string of a row"""
+        code = self.value_codes[row]
+        return self.values[code] if code >= 0 else None
+
+    def rows_by_object(self, object_ids: np.ndarray) -> Dict[int, np.ndarray]:
+        """
+        Find the rows assigned to each of the given interfaces
+
+        Args:
+            object_ids: Interface IDs to look up
+
+        Returns:
+            Mapping of interface ID to the row indexes assigned to it
+        """
+        return _rows_by_key(self.object_ids, object_ids)
+
+
+class InterfaceTable:
+    """Columnar view of interfaces and the MAC addresses embedded in them
+
+    Interfaces are rows of ids/name_codes. The MAC addresses listed in each
+    interface's mac_addresses field are flattened into parallel mac_owner,
+    mac_ids and mac_value_codes arrays.
+    """
+
+    def __init__(self, ids: np.ndarray, name_codes: np.ndarray, names: List[str],
+                 mac_owner: np.ndarray, mac_ids: np.ndarray,
+                 mac_value_codes: np.ndarray, mac_values: List[str]):
+        """
+        Initialize InterfaceTable from its columns
+
+        Args:
+            ids: Interface IDs
+            name_codes: Index into names of each interface's name
+            names: Distinct interface names
+            mac_owner: Interface ID of each embedded MAC address
+            mac_ids: ID of each embedded MAC address
+            mac_value_codes: Index into mac_values of each embedded MAC address
+            mac_values: Distinct MAC address strings
+        """
+        self.ids = ids
+        self.name_codes = name_codes
+        self.names = names
+        self.mac_owner = mac_owner
+        self.mac_ids = mac_ids
+        self.mac_value_codes = mac_value_codes
+        self.mac_values = mac_values
+        self._order = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_records(cls, records: Iterable, with_macs: bool = True) -> 'InterfaceTable':
+        """
+        Build a table from interface objects
+
+        Args:
+            records: Objects from dcim/interfaces/ (Record, pynetbox Record or
+                dict); may be a generator
+            with_macs: Read the embedded mac_addresses field (NetBox 4.2+)
+
+        Returns:
+            InterfaceTable with one row per interface
+        """
+        ids = array('q')
+        name_codes = array('i')
+        names = _Labels()
+        mac_owner = array('q')
+        mac_ids = array('q')
+        mac_value_codes = array('i')
+        mac_values = _Labels()
+        for record in records:
+            interface_id = _field(record, 'id')
+            ids.append(interface_id)
+            name_codes.append(names.code(_field(record, 'name')))
+            if with_macs:
+                for mac in _field(record, 'mac_addresses') or []:
+                    mac_owner.append(interface_id)
+                    mac_ids.append(_field(mac, 'id'))
+                    mac_value_codes.append(mac_values.code(_field(mac, 'mac_address')))
+        return cls(
+            np.frombuffer(ids, dtype=np.int64),
+            np.frombuffer(name_codes, dtype=np.int32),
+            names.values,
+            np.frombuffer(mac_owner, dtype=np.int64),
+            np.frombuffer(mac_ids, dtype=np.int64),
+            np.frombuffer(mac_value_codes, dtype=np.int32),
+            mac_values.values
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, str]],
+                  macs: Iterable[Tuple[int, Optional[int], Optional[str]]] = ()) -> 'InterfaceTable':
+        """
+        Build a table from (id, name) tuples and the MAC addresses assigned
+
+        Args:
+            rows: Interface tuples; may be a generator
+            macs: (MAC ID, interface ID, address) tuples as read for
+                AddressTable.from_rows(); unassigned MACs are skipped
+
+        Returns:
+            InterfaceTable with one row per interface tuple
+        """
+        ids = array('q')
+        name_codes = array('i')
+        names = _Labels()
+        for interface_id, name in rows:
+            ids.append(interface_id)
+            name_codes.append(names.code(name))
+        mac_owner = array('q')
+        mac_ids = array('q')
+        mac_value_codes = array('i')
+        mac_values = _Labels()
+        for mac_id, interface_id, value in macs:
+            if interface_id:
+                mac_owner.append(interface_id)
+                mac_ids.append(mac_id)
+                mac_value_codes.append(mac_values.code(value))
+        return cls(
+            np.frombuffer(ids, dtype=np.int64),
+            np.frombuffer(name_codes, dtype=np.int32),
+            names.values,
+            np.frombuffer(mac_owner, dtype=np.int64),
+            np.frombuffer(mac_ids, dtype=np.int64),
+            np.frombuffer(mac_value_codes, dtype=np.int32),
+            mac_values.values
+        )
+
+    def updated(self, changes: 'InterfaceTable', removed_ids: Iterable[int]) -> 'InterfaceTable':
+        """
+        Apply changed and removed interfaces to the table
+
+        Embedded MAC addresses of changed and removed interfaces are
+        replaced along with the interface.
+
+        Args:
+            changes: Table of the interfaces created or changed since this
+                table was built; their rows replace any existing ones
+            removed_ids: IDs of interfaces that were deleted or left the
+                scope of the table
+
+        Returns:
+            New InterfaceTable with the unchanged rows followed by the rows
+            of changes
+        """
+        keep = _kept_rows(self.ids, changes.ids, removed_ids)
+        keep_macs = np.isin(self.mac_owner, self.ids[keep])
+        names, name_mapping = _merge_labels(self.names, changes.names)
+        mac_values, mac_mapping = _merge_labels(self.mac_values, changes.mac_values)
+        return InterfaceTable(
+            np.concatenate([self.ids[keep], changes.ids]),
+            np.concatenate([self.name_codes[keep], name_mapping[changes.name_codes]]),
+            names,
+            np.concatenate([self.mac_owner[keep_macs], changes.mac_owner]),
+            np.concatenate([self.mac_ids[keep_macs], changes.mac_ids]),
+            np.concatenate([self.mac_value_codes[keep_macs], mac_mapping[changes.mac_value_codes]]),
+            mac_values
+        )
+
+    def names_for(self, interface_ids: np.ndarray) -> List[str]:
+        """
+        Look up interface names by ID
+
+        Args:
+            interface_ids: Interface IDs
+
+        Returns:
+            Name of each interface, or '#<id>' for IDs not in the table
+        """
+        if self._order is None:
+            self._order = np.argsort(self.ids, kind='stable')
+        interface_ids = np.asarray(interface_ids, dtype=np.int64)
+        sorted_ids = self.ids[self._order]
+        positions = np.searchsorted(sorted_ids, interface_ids)
+        positions = np.minimum(positions, max(len(sorted_ids) - 1, 0))
+        names = []
+        for interface_id, position in zip(interface_ids.tolist(), positions.tolist()):
+            if len(sorted_ids) and sorted_ids[position] == interface_id:
+                code = self.name_codes[self._order[position]]
+                names.append(self.names[code] if code >= 0 else f"#{interface_id}")
+            else:
+                names.append(f"#{interface_id}")
+        return names
+
+    def mac_rows_by_interface(self, interface_ids: np.ndarray) -> Dict[int, np.ndarray]:
+        """
+        Find the embedded MAC addresses of each of the given interfaces
+
+        Args:
+            interface_ids: Interface IDs to look up
+
+        Returns:
+            Mapping of interface ID to indexes into mac_ids/mac_value_codes
+        """
+        return _rows_by_key(self.mac_owner, interface_ids)
+
+    def mac_value(self, index: int) -> Optional[str]:
+        """Return the address string of an embedded MAC address"""
+        code = self.mac_value_codes[index]
+        return self.mac_values[code] if code >= 0 else None
+
+
+def duplicate_ids(ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find IDs that occur more than once
+
+    Args:
+        ids: Object IDs
+
+    Returns:
+        The duplicated IDs and how many times each occurs
+    """
+    unique, counts = np.unique(ids, return_counts=True)
+    duplicated = counts > 1
+    return unique[duplicated], counts[duplicated]
+
+
+def assignment_counts(table: AddressTable, object_ids: np.ndarray) -> np.ndarray:
+    """
+    Count the rows assigned to each of the given interfaces
+
+    Args:
+        table: IP or MAC address table
+        object_ids: Interface IDs
+
+    Returns:
+        Number of rows assigned to each interface, aligned with object_ids
+    """
+    assigned = np.sort(table.object_ids[table.object_ids != 0])
+    object_ids = np.asarray(object_ids, dtype=np.int64)
+    return np.searchsorted(assigned, object_ids, side='right') - np.searchsorted(assigned, object_ids, side='left')
+
+
+def assigned_objects(table: AddressTable) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the interfaces that rows are assigned to
+
+    Args:
+        table: IP or MAC address table
+
+    Returns:
+        Distinct assigned interface IDs and the number of rows for each
+    """
+    return np.unique(table.object_ids[table.object_ids != 0], return_counts=True)
+
+
+def missing_assignments(table: AddressTable, object_ids: np.ndarray) -> np.ndarray:
+    """
+    Find interfaces that have no rows assigned to them
+
+    Args:
+        table: IP or MAC address table
+        object_ids: Interface IDs expected to have assignments
+
+    Returns:
+        Interface IDs without any assigned row
+    """
+    return np.setdiff1d(object_ids, table.object_ids)
+
+
+def unknown_assignments(table: AddressTable, object_ids: np.ndarray) -> np.ndarray:
+    """
+    Find rows assigned to interfaces outside the given set
+
+    Args:
+        table: IP or MAC address table
+        object_ids: Known interface IDs
+
+    Returns:
+        Row indexes assigned to an interface not in object_ids
+    """
+    assigned = table.object_ids != 0
+    return np.flatnonzero(assigned & ~np.isin(table.object_ids, object_ids))
+
+
+def cardinality_violations(table: AddressTable, object_ids: np.ndarray,
+                           expected: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find interfaces that do not have exactly the expected number of rows
+
+    Args:
+        table: IP or MAC address table
+        object_ids: Interface IDs to check
+        expected: Number of rows each interface should have
+
+    Returns:
+        Offending interface IDs and their row counts
+    """
+    object_ids = np.asarray(object_ids, dtype=np.int64)
+    counts = assignment_counts(table, object_ids)
+    wrong = counts != expected
+    return object_ids[wrong], counts[wrong]
+
+
+def embedded_cardinality_violations(interfaces: InterfaceTable,
+                                    expected: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find interfaces whose embedded mac_addresses list has the wrong length
+
+    Args:
+        interfaces: Interface table
+        expected: Number of MAC addresses each interface should list
+
+    Returns:
+        Offending interface IDs and their embedded MAC counts
+    """
+    owners = np.sort(interfaces.mac_owner)
+    counts = (np.searchsorted(owners, interfaces.ids, side='right')
+              - np.searchsorted(owners, interfaces.ids, side='left'))
+    wrong = counts != expected
+    return interfaces.ids[wrong], counts[wrong]
+
+
+def _pair_keys(object_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Pack (interface ID, object ID) pairs, both below 2**31, into int64 keys"""
+    return (object_ids.astype(np.int64) << 32) | ids.astype(np.int64)
+
+
+def _unpack_keys(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Split keys made by _pair_keys back into interface and object IDs"""
+    return keys >> 32, keys & 0xFFFFFFFF
+
+
+def mac_assignment_mismatches(macs: AddressTable, interfaces: InterfaceTable
+                              ) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+    """
+    Compare MAC assignments reported by the two endpoints
+
+    Args:
+        macs: Table built from dcim/mac-addresses/
+        interfaces: Table built from dcim/interfaces/ with embedded MACs
+
+    Returns:
+        (interface IDs, MAC IDs) of assignments only reported by
+        dcim/mac-addresses/, and of those only reported by dcim/interfaces/
+    """
+    from_interfaces = np.unique(_pair_keys(interfaces.mac_owner, interfaces.mac_ids))
+    return _key_differences(_assignment_keys(macs), from_interfaces)
+
+
+def assignment_mismatches(left: AddressTable, right: AddressTable
+                          ) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+    """
+    Compare the assignments of two tables of the same addresses
+
+    Used to cross-check one source against another, e.g. the REST
+    ipam/ip-addresses/ endpoint against the addresses nested in a GraphQL
+    interface query.
+
+    Args:
+        left: First table
+        right: Second table
+
+    Returns:
+        (interface IDs, object IDs) of assignments only in left, and of
+        those only in right
+    """
+    return _key_differences(_assignment_keys(left), _assignment_keys(right))
+
+
+def _assignment_keys(table: AddressTable) -> np.ndarray:
+    """Distinct pair keys of the assigned rows of a table"""
+    assigned = table.object_ids != 0
+    return np.unique(_pair_keys(table.object_ids[assigned], table.ids[assigned]))
+
+
+def _key_differences(left: np.ndarray, right: np.ndarray
+                     ) -> Tuple[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+    """Unpacked pair keys only in left, and only in right (both unique)"""
+    only_left = np.setdiff1d(left, right, assume_unique=True)
+    only_right = np.setdiff1d(right, left, assume_unique=True)
+    return _unpack_keys(only_left), _unpack_keys(only_right)
+
+
+def ipam_report(interfaces: InterfaceTable, ips: AddressTable,
+                macs: Optional[AddressTable] = None) -> List[str]:
+    """
+    Run every IPAM check on a device's interfaces, IP and MAC addresses
+
+    Every interface of the dummy device should have the two addresses
+    insert_dummy_data.py assigns and one MAC address, listed the same way by
+    dcim/mac-addresses/ and the interfaces' embedded mac_addresses.
+
+    Args:
+        interfaces: Interface table (with embedded MACs if macs is given)
+        ips: IP address table
+        macs: MAC address table (NetBox 4.2+)
+
+    Returns:
+        Report lines; each inconsistency is a line starting with 'BUG:'
+    """
+    lines = []
+    ip_interfaces, ip_counts = assigned_objects(ips)
+    lines.append(f"Found {len(ip_interfaces)} interfaces with {ip_counts.sum()} IP addresses")
+    if macs is not None:
+        mac_interfaces, mac_counts = assigned_objects(macs)
+        lines.append(f"Found {len(mac_interfaces)} interfaces with {mac_counts.sum()} MAC addresses")
+    lines += ["", "Each interface should have exactly two addresses",
+              "- 172.17.0.1/32", "- ff1d:c7c:7b44:d39d:ab3d:6fde:f46a:4648/64", ""]
+    if macs is not None:
+        lines += ["Each interface should have exactly one MAC address", "- 18:2A:D3:65:90:2E", ""]
+
+    # The same object returned on more than one page
+    duplicated, counts = duplicate_ids(ips.ids)
+    for ip_id, count in zip(duplicated, counts):
+        lines.append(f"BUG: IP address ID {ip_id} was returned {count} times")
+
+    # Check every interface, including those that no IP address points at
+    violating, counts = cardinality_violations(ips, np.union1d(interfaces.ids, ip_interfaces), 2)
+    rows = ips.rows_by_object(violating)
+    for interface_id, name, count in zip(violating, interfaces.names_for(violating), counts):
+        lines.append(f"BUG: Interface {name} has {count} IP addresses")
+        for row in rows.get(interface_id, []):
+            lines.append(f"IP {ips.value(row)} (ID: {ips.ids[row]}) is assigned to {name}")
+    lines.append("")
+
+    if macs is not None:
+        duplicated, counts = duplicate_ids(macs.ids)
+        for mac_id, count in zip(duplicated, counts):
+            lines.append(f"BUG: MAC address ID {mac_id} was returned {count} times")
+
+        violating, counts = cardinality_violations(macs, np.union1d(interfaces.ids, mac_interfaces), 1)
+        rows = macs.rows_by_object(violating)
+        for interface_id, name, count in zip(violating, interfaces.names_for(violating), counts):
+            lines.append(f"BUG: Interface {name} has {count} MAC addresses")
+            for row in rows.get(interface_id, []):
+                lines.append(f"MAC {macs.value(row)} (ID: {macs.ids[row]}) is assigned to {name}")
+        lines.append("")
+
+        violating, counts = embedded_cardinality_violations(interfaces, 1)
+        rows = interfaces.mac_rows_by_interface(violating)
+        for interface_id, name, count in zip(violating, interfaces.names_for(violating), counts):
+            lines.append(f"BUG: Interface {name} has {count} MAC addresses")
+            for row in rows.get(interface_id, []):
+                lines.append(f"MAC {interfaces.mac_value(row)} (ID: {interfaces.mac_ids[row]}) is assigned to {name}")
+    return lines
+
+
+def mac_report(interfaces: InterfaceTable, macs: AddressTable) -> List[str]:
+    """
+    Compare the MAC assignments of dcim/mac-addresses/ and dcim/interfaces/
+
+    Args:
+        interfaces: Interface table with embedded MACs
+        macs: MAC address table
+
+    Returns:
+        Report lines; each inconsistency is a line starting with 'BUG:'
+    """
+    lines = []
+    mac_interfaces, mac_counts = assigned_objects(macs)
+    total_macs = int(mac_counts.sum())
+    lines.append(f"Found {total_macs} MAC addresses on {len(mac_interfaces)} interfaces with from dcim.mac_addresses endpoint.")
+
+    interface_macs = np.unique(interfaces.mac_owner)
+    total_macs_from_interface = len(interfaces.mac_ids)
+    lines.append(f"Found {total_macs_from_interface} MAC addresses on {len(interface_macs)} interfaces from dcim.interfaces endpoint.")
+
+    # Totals of MAC addresses, and of interfaces with MAC addresses, reported by both endpoints
+    if total_macs != total_macs_from_interface:
+        lines.append(f"BUG: Total MAC addresses from dcim.mac_addresses endpoint ({total_macs}) does not match total MAC addresses from dcim.interfaces endpoint ({total_macs_from_interface})")
+    if len(mac_interfaces) != len(interface_macs):
+        lines.append(f"BUG: Total interfaces from dcim.mac_addresses endpoint ({len(mac_interfaces)}) does not match total interfaces from dcim.interfaces endpoint ({len(interface_macs)})")
+
+    # Compare the individual (interface, MAC address) assignments reported by both endpoints
+    (only_mac_interfaces, only_mac_ids), (only_interface_interfaces, only_interface_mac_ids) = \
+        mac_assignment_mismatches(macs, interfaces)
+    for name, mac_id in zip(interfaces.names_for(only_mac_interfaces), only_mac_ids):
+        lines.append(f"BUG: MAC address ID {mac_id} is assigned to {name} by dcim.mac_addresses endpoint but not listed on it by dcim.interfaces endpoint")
+    for name, mac_id in zip(interfaces.names_for(only_interface_interfaces), only_interface_mac_ids):
+        lines.append(f"BUG: MAC address ID {mac_id} is listed on {name} by dcim.interfaces endpoint but not assigned to it by dcim.mac_addresses endpoint")
+    return lines
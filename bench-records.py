@@ -0,0 +1,87 @@
+#!venv/bin/python
+
+# Compare construction time and memory of DotDict and Record on a synthetic
+# IP address payload shaped like NetBox's ipam/ip-addresses/ responses.
+
+import gc
+import json
+import time
+import tracemalloc
+from netbox import DotDict, Record
+
+OBJECT_COUNT = 20000
+
+
+def ip_address(i):
+    interface_id = i // 2 + 1
+    return {
+        "id": i + 1,
+        "url": f"http://localhost:8080/api/ipam/ip-addresses/{i + 1}/",
+        "display": "172.17.0.1/32",
+        "family": {"value": 4, "label": "IPv4"},
+        "address": "172.17.0.1/32",
+        "vrf": None,
+        "tenant": {"id": 1, "url": "http://localhost:8080/api/tenancy/tenants/1/", "display": "dummy tenant", "name": "dummy tenant", "slug": "dummy-tenant"},
+        "status": {"value": "active", "label": "Active"},
+        "role": None,
+        "assigned_object_type": "dcim.interface",
+        "assigned_object_id": interface_id,
+        "assigned_object": {
+            "id": interface_id,
+            "url": f"http://localhost:8080/api/dcim/interfaces/{interface_id}/",
+            "display": f"dummy{interface_id - 1}",
+            "device": {"id": 1, "url": "http://localhost:8080/api/dcim/devices/1/", "display": "dummy switch", "name": "dummy switch"},
+            "name": f"dummy{interface_id - 1}",
+            "cable": None,
+            "_occupied": False
+        },
+        "nat_inside": {"id": 1, "url": "http://localhost:8080/api/ipam/ip-addresses/1/", "display": "10.0.0.1/32", "family": 4, "address": "10.0.0.1/32"},
+        "nat_outside": [],
+        "dns_name": "",
+        "description": "",
+        "comments": "",
+        "tags": [{"id": 1, "url": "http://localhost:8080/api/extras/tags/1/", "display": "dummy", "name": "dummy", "slug": "dummy", "color": "ff0000"}],
+        "custom_fields": {"owner": None, "ticket-id": None},
+        "created": "2025-01-01T00:00:00.000000Z",
+        "last_updated": "2025-01-01T00:00:00.000000Z"
+    }
+
+
+def measure(record_type, payload):
+    """Time construction and grouping, then trace memory of decode+build"""
+    results = json.loads(payload)["results"]
+    gc.collect()
+    started = time.perf_counter()
+    records = [record_type(item) for item in results]
+    constructed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    interface_ips = {}
+    for ip in records:
+        if ip.assigned_object and ip.assigned_object.name:
+            interface_ips.setdefault(ip.assigned_object.name, []).append(ip.address)
+    accessed = time.perf_counter() - started
+    del results, records, interface_ips
+
+    # Memory held once the page has been converted and the raw decode is gone
+    gc.collect()
+    tracemalloc.start()
+    records = [record_type(item) for item in json.loads(payload)["results"]]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return constructed, accessed, current, peak
+
+
+payload = json.dumps({"count": OBJECT_COUNT, "next": None, "previous": None,
+                      "results": [ip_address(i) for i in range(OBJECT_COUNT)]})
+
+print(f"{OBJECT_COUNT} IP address objects, {len(payload) / 1e6:.1f} MB of JSON")
+print()
+print(f"{'type':<10} {'build':>13} {'group':>9} {'resident':>10} {'peak':>10}")
+for record_type in (DotDict, Record):
+    constructed, accessed, current, peak = measure(record_type, payload)
+    print(f"{record_type.__name__:<10} "
+          f"{constructed * 1000:>10.1f} ms "
+          f"{accessed * 1000:>6.1f} ms "
+          f"{current / 1e6:>7.1f} MB "
+          f"{peak / 1e6:>7.1f} MB")
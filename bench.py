@@ -0,0 +1,163 @@
+#!venv/bin/python
+
+"""Offline client benchmarks against the in-process fake NetBox server
+
+Starts fake_netbox.FakeNetBoxServer on a free port and pulls one endpoint
+with each client mode, reporting throughput, p50/p99 page latency and peak
+traced memory. Each mode runs twice: once for timing and once under
+tracemalloc, which slows Python down too much to time in the same run.
+
+    ./bench.py --interfaces 10000 --page-size 100 --latency 0.005
+    ./bench.py --modes raw,raw-parallel,pynetbox --shuffle > bench_output.txt
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import pynetbox
+
+from fake_netbox import FakeNetBoxServer, start_server
+from audit import IPAM_AUDIT_FIELDS
+from netbox import AdaptiveConcurrency, AsyncNetBoxAPI, NetBoxAPI
+
+
+def run_raw(url: str, endpoint: str, params: Dict, latencies: List[float],
+            concurrency: Optional[AdaptiveConcurrency] = None, **options) -> int:
+    with NetBoxAPI(url, "bench", on_request=lambda event: latencies.append(event.elapsed),
+                   concurrency=concurrency) as nb:
+        return len(nb.get(endpoint, dict(params), **options))
+
+
+def run_raw_stream(url: str, endpoint: str, params: Dict, latencies: List[float]) -> int:
+    with NetBoxAPI(url, "bench", on_request=lambda event: latencies.append(event.elapsed)) as nb:
+        return sum(1 for _ in nb.iter_results(endpoint, dict(params)))
+
+
+def run_async(url: str, endpoint: str, params: Dict, latencies: List[float]) -> int:
+    async def fetch():
+        async with AsyncNetBoxAPI(url, "bench", on_request=lambda event: latencies.append(event.elapsed)) as nb:
+            return len(await nb.get(endpoint, dict(params), parallel=True))
+    return asyncio.run(fetch())
+
+
+def run_pynetbox(url: str, endpoint: str, params: Dict, latencies: List[float], threading: bool = False) -> int:
+    nb = pynetbox.api(url, token="bench", threading=threading)
+    nb.http_session.hooks['response'].append(
+        lambda response, *args, **kwargs: latencies.append(response.elapsed.total_seconds())
+    )
+    app, name = endpoint.strip('/').split('/')
+    records = getattr(getattr(nb, app), name.replace('-', '_')).filter(**params)
+    return len(list(records))
+
+
+MODES: Dict[str, Callable] = {
+    'raw': run_raw,
+    'raw-parallel': lambda *args: run_raw(*args, parallel=True),
+    'raw-parallel-16': lambda *args: run_raw(*args, parallel=True, max_workers=16),
+    'raw-adaptive': lambda *args: run_raw(*args, parallel=True, max_workers=16,
+                                          concurrency=AdaptiveConcurrency(maximum=16)),
+    'raw-cursor': lambda *args: run_raw(*args, cursor=True),
+    'raw-repair': lambda *args: run_raw(*args, repair=True),
+    'raw-dict': lambda *args: run_raw(*args, output='dict'),
+    'raw-fields': lambda url, endpoint, *args: run_raw(url, endpoint, *args, fields=IPAM_AUDIT_FIELDS.get(endpoint)),
+    'raw-brief': lambda *args: run_raw(*args, brief=True),
+    'raw-stream': run_raw_stream,
+    'async': run_async,
+    'pynetbox': run_pynetbox,
+    'pynetbox-threading': lambda *args: run_pynetbox(*args, threading=True),
+}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of values"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench(mode: str, server: FakeNetBoxServer, endpoint: str, params: Dict) -> Dict:
+    """Run one mode for timing, then again for peak memory"""
+    run = MODES[mode]
+    url = server.url
+    latencies = []
+    rejected = server.rejected
+    gc.collect()
+    started = time.perf_counter()
+    count = run(url, endpoint, params, latencies)
+    elapsed = time.perf_counter() - started
+    rejected = server.rejected - rejected
+
+    gc.collect()
+    tracemalloc.start()
+    run(url, endpoint, params, [])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'mode': mode,
+        'objects': count,
+        'pages': len(latencies),
+        'elapsed': elapsed,
+        'rate': count / elapsed if elapsed else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p99': percentile(latencies, 0.99),
+        'rejected': rejected,
+        'peak': peak
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NetBox client modes against a fake NetBox server")
+    parser.add_argument("--interfaces", type=int, default=10000, help="interfaces on the fake device")
+    parser.add_argument("--endpoint", default="ipam/ip-addresses/", help="endpoint to pull")
+    parser.add_argument("--page-size", type=int, default=100, help="limit per page")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum random seconds added to latency")
+    parser.add_argument("--shuffle", action="store_true", help="non-deterministic server ordering")
+    parser.add_argument("--capacity", type=int, default=0,
+                        help="requests the server handles at once, 503 beyond twice that (0 for unlimited)")
+    parser.add_argument("--version", default="4.2.0", help="NetBox version reported by the fake server")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma separated, from: {', '.join(MODES)}")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+
+    server, _ = start_server(interface_count=args.interfaces, version=args.version,
+                             latency=args.latency, jitter=args.jitter, shuffle=args.shuffle,
+                             capacity=args.capacity)
+    params = {"device_id": 1, "limit": args.page_size}
+
+    print(f"Fake NetBox {args.version} on {server.url}: {args.interfaces} interfaces, "
+          f"{args.endpoint} with limit={args.page_size}, latency {args.latency * 1000:.0f}ms "
+          f"(+{args.jitter * 1000:.0f}ms jitter){', shuffled' if args.shuffle else ''}"
+          f"{f', capacity {args.capacity}' if args.capacity else ''}")
+    print()
+    print(f"{'mode':<20} {'objects':>8} {'pages':>6} {'time':>9} {'objects/s':>10} "
+          f"{'p50 page':>10} {'p99 page':>10} {'503s':>6} {'peak mem':>10}")
+    try:
+        for mode in modes:
+            try:
+                result = bench(mode, server, args.endpoint, params)
+            except Exception as e:
+                print(f"{mode:<20} failed: {e}")
+                continue
+            print(f"{result['mode']:<20} {result['objects']:>8} {result['pages']:>6} "
+                  f"{result['elapsed']:>8.2f}s {result['rate']:>10.0f} "
+                  f"{result['p50'] * 1000:>8.1f}ms {result['p99'] * 1000:>8.1f}ms "
+                  f"{result['rejected']:>6} {result['peak'] / 1e6:>7.1f} MB")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
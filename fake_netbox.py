@@ -0,0 +1,647 @@
+#!venv/bin/python
+
+"""In-process stand-in for the NetBox REST API used by the test scripts
+
+Serves /api/status/, /api/dcim/devices/, /api/dcim/interfaces/,
+/api/ipam/ip-addresses/, /api/dcim/mac-addresses/, /api/core/object-changes/
+and the interface_list GraphQL query for one or more devices with the same
+data layout that insert_dummy_data.py creates: every interface has two IP
+addresses and one MAC address. Pagination, filtering by device_id, id,
+last_updated and (for devices) site, role and tag, and
+ordering follow NetBox's REST conventions closely enough for NetBoxAPI and
+pynetbox. FakeNetBoxData.create(), update() and delete() change objects and
+log the change in the changelog like NetBox does; IP and MAC addresses can
+also be created, updated and deleted through the REST API (single objects
+and bulk lists), so writers can run against the server while it is read.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+DEVICE_ID = 1
+IPV4_ADDRESS = "172.17.0.1/32"
+IPV6_ADDRESS = "ff1d:c7c:7b44:d39d:ab3d:6fde:f46a:4648/64"
+MAC_ADDRESS = "18:2A:D3:65:90:2E"
+
+# NetBox's PAGINATE_COUNT and MAX_PAGE_SIZE defaults
+PAGINATE_COUNT = 50
+MAX_PAGE_SIZE = 1000
+
+# Changelog object type of each endpoint
+OBJECT_TYPES = {
+    'dcim/devices': 'dcim.device',
+    'dcim/interfaces': 'dcim.interface',
+    'ipam/ip-addresses': 'ipam.ipaddress',
+    'dcim/mac-addresses': 'dcim.macaddress',
+}
+
+# Endpoints accepting POST, PATCH and DELETE
+WRITABLE = ('ipam/ip-addresses', 'dcim/mac-addresses')
+
+# Fields of the brief representation (?brief=true) of each endpoint
+BRIEF_FIELDS = {
+    'dcim/devices': ('id', 'url', 'display', 'name', 'description'),
+    'dcim/interfaces': ('id', 'url', 'display', 'device', 'name', 'description', 'cable', '_occupied'),
+    'ipam/ip-addresses': ('id', 'url', 'display', 'family', 'address', 'description'),
+    'dcim/mac-addresses': ('id', 'url', 'display', 'mac_address', 'description'),
+    'core/object-changes': ('id', 'url', 'display', 'time', 'action', 'changed_object_type',
+                            'changed_object_id'),
+}
+
+
+def _timestamp() -> str:
+    """Current time formatted like NetBox's API"""
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+class FakeNetBoxData:
+    """Objects served by the fake server, keyed by endpoint"""
+
+    def __init__(self, base_url: str, interface_count: int = 10000, with_macs: bool = True,
+                 device_count: int = 1):
+        """
+        Build the dataset
+
+        Args:
+            base_url: URL the server is reachable on, used for 'url' fields
+            interface_count: Number of interfaces on each device
+            with_macs: Serve MAC addresses (NetBox 4.2+ data model)
+            device_count: Number of devices, with IDs from DEVICE_ID up
+        """
+        self.base_url = base_url.rstrip('/')
+        self.with_macs = with_macs
+        self.lock = threading.Lock()
+        self.last_ids = {}
+        self.objects = {
+            'dcim/devices': {},
+            'dcim/interfaces': {},
+            'ipam/ip-addresses': {},
+            'dcim/mac-addresses': {},
+            'core/object-changes': {}
+        }
+        now = _timestamp()
+        devices = []
+        for index in range(device_count):
+            device_id = DEVICE_ID + index
+            name = "dummy switch" if index == 0 else f"dummy switch {index + 1}"
+            device = {"id": device_id, "url": f"{self.base_url}/api/dcim/devices/{device_id}/",
+                      "display": name, "name": name}
+            devices.append(device)
+            self.objects['dcim/devices'][device_id] = dict(
+                device,
+                site={"id": 1, "slug": "dummy-site", "name": "dummy site"},
+                role={"id": 1, "slug": "dummy-switch-role", "name": "dummy switch role"},
+                status={"value": "active", "label": "Active"},
+                description="",
+                tags=[],
+                custom_fields={},
+                last_updated=now
+            )
+
+        for i in range(interface_count * device_count):
+            interface_id = i + 1
+            device = devices[i // interface_count]
+            name = f"dummy{i % interface_count}"
+            interface = {
+                "id": interface_id,
+                "url": f"{self.base_url}/api/dcim/interfaces/{interface_id}/",
+                "display": name,
+                "device": device,
+                "name": name,
+                "type": {"value": "1000base-t", "label": "1000BASE-T (1GE)"},
+                "enabled": True,
+                "mtu": None,
+                "description": "",
+                "cable": None,
+                "tags": [],
+                "custom_fields": {},
+                "last_updated": now,
+                "_occupied": False
+            }
+            if with_macs:
+                interface["mac_addresses"] = []
+            self.objects['dcim/interfaces'][interface_id] = interface
+
+            for offset, address in enumerate((IPV4_ADDRESS, IPV6_ADDRESS)):
+                ip_id = 2 * i + offset + 1
+                self.objects['ipam/ip-addresses'][ip_id] = {
+                    "id": ip_id,
+                    "url": f"{self.base_url}/api/ipam/ip-addresses/{ip_id}/",
+                    "display": address,
+                    "family": {"value": 6 if offset else 4, "label": "IPv6" if offset else "IPv4"},
+                    "address": address,
+                    "vrf": None,
+                    "tenant": None,
+                    "status": {"value": "active", "label": "Active"},
+                    "role": None,
+                    "assigned_object_type": "dcim.interface",
+                    "assigned_object_id": interface_id,
+                    "nat_inside": None,
+                    "nat_outside": [],
+                    "dns_name": "",
+                    "description": "",
+                    "tags": [],
+                    "custom_fields": {},
+                    "last_updated": now
+                }
+
+            if with_macs:
+                mac_id = interface_id
+                self.objects['dcim/mac-addresses'][mac_id] = {
+                    "id": mac_id,
+                    "url": f"{self.base_url}/api/dcim/mac-addresses/{mac_id}/",
+                    "display": MAC_ADDRESS,
+                    "mac_address": MAC_ADDRESS,
+                    "assigned_object_type": "dcim.interface",
+                    "assigned_object_id": interface_id,
+                    "description": "",
+                    "tags": [],
+                    "custom_fields": {},
+                    "last_updated": now
+                }
+                interface["mac_addresses"].append(self._brief_mac(mac_id))
+
+    def _brief_mac(self, mac_id: int) -> Dict:
+        """Brief representation of a MAC address, as nested in interfaces"""
+        mac = self.objects['dcim/mac-addresses'][mac_id]
+        return {"id": mac_id, "url": mac["url"], "display": mac["display"],
+                "mac_address": mac["mac_address"]}
+
+    def _brief_interface(self, interface_id: int) -> Optional[Dict]:
+        """Brief representation of an interface, as nested in assignments"""
+        interface = self.objects['dcim/interfaces'].get(interface_id)
+        if interface is None:
+            return None
+        return {"id": interface_id, "url": interface["url"], "display": interface["display"],
+                "device": interface["device"], "name": interface["name"],
+                "cable": None, "_occupied": False}
+
+    def render(self, endpoint: str, obj: Dict, fields: Optional[List[str]] = None,
+               brief: bool = False) -> Dict:
+        """
+        Representation of an object as NetBox would serialize it
+
+        Args:
+            endpoint: Dataset key of the object
+            obj: Stored object
+            fields: Only include these fields (?fields=)
+            brief: Brief representation (?brief=true)
+
+        Returns:
+            Serializable object, with nested assigned_object if requested
+        """
+        if fields is None:
+            fields = BRIEF_FIELDS[endpoint] if brief else None
+        if endpoint in ('ipam/ip-addresses', 'dcim/mac-addresses') and (fields is None or 'assigned_object' in fields):
+            obj = dict(obj, assigned_object=self._brief_interface(obj["assigned_object_id"]))
+        if fields is None:
+            return obj
+        return {field: obj[field] for field in fields if field in obj}
+
+    def create(self, endpoint: str, **fields) -> Dict:
+        """
+        Create an IP or MAC address, logging its creation
+
+        Args:
+            endpoint: Dataset key ('ipam/ip-addresses' or 'dcim/mac-addresses')
+            **fields: Field values; address (or mac_address) and
+                assigned_object_id are expected
+
+        Returns:
+            The stored object
+        """
+        with self.lock:
+            objects = self.objects[endpoint]
+            # IDs come from a sequence and are never reused, as in PostgreSQL
+            object_id = self.last_ids.get(endpoint, max(objects, default=0)) + 1
+            self.last_ids[endpoint] = object_id
+            value_field = 'mac_address' if endpoint == 'dcim/mac-addresses' else 'address'
+            now = _timestamp()
+            obj = {
+                "id": object_id,
+                "url": f"{self.base_url}/api/{endpoint}/{object_id}/",
+                "display": fields.get(value_field, ""),
+                "assigned_object_type": "dcim.interface",
+                "assigned_object_id": None,
+                "description": "",
+                "tags": [],
+                "custom_fields": {},
+            }
+            obj.update(fields, last_updated=now)
+            objects[object_id] = obj
+            if endpoint == 'dcim/mac-addresses':
+                self._embed_mac(object_id, None, obj["assigned_object_id"])
+            self._log_change(endpoint, object_id, 'create', now)
+            return obj
+
+    def _log_change(self, endpoint: str, object_id: int, action: str, time: str):
+        """Append an entry to the changelog"""
+        changes = self.objects['core/object-changes']
+        change_id = len(changes) + 1
+        changes[change_id] = {
+            "id": change_id,
+            "url": f"{self.base_url}/api/core/object-changes/{change_id}/",
+            "display": f"{OBJECT_TYPES[endpoint]} {object_id} {action}",
+            "time": time,
+            "action": {"value": action, "label": action.title()},
+            "changed_object_type": OBJECT_TYPES[endpoint],
+            "changed_object_id": object_id
+        }
+
+    def _embed_mac(self, mac_id: int, old_interface: Optional[int], new_interface: Optional[int]):
+        """Move a MAC address between the mac_addresses lists of interfaces"""
+        interfaces = self.objects['dcim/interfaces']
+        if old_interface in interfaces:
+            interfaces[old_interface]["mac_addresses"] = [
+                mac for mac in interfaces[old_interface]["mac_addresses"] if mac["id"] != mac_id]
+        if new_interface in interfaces:
+            interfaces[new_interface]["mac_addresses"].append(self._brief_mac(mac_id))
+
+    def update(self, endpoint: str, object_id: int, **changes):
+        """
+        Change fields of an object, logging an update
+
+        Reassigning an IP or MAC address is done by changing its
+        assigned_object_id; MAC addresses are moved between the embedded
+        mac_addresses lists of the interfaces accordingly.
+
+        Args:
+            endpoint: Dataset key of the object
+            object_id: ID of the object
+            **changes: New field values
+        """
+        with self.lock:
+            obj = self.objects[endpoint][object_id]
+            old_interface = obj.get("assigned_object_id")
+            now = _timestamp()
+            obj.update(changes, last_updated=now)
+            if endpoint == 'dcim/mac-addresses' and obj["assigned_object_id"] != old_interface:
+                self._embed_mac(object_id, old_interface, obj["assigned_object_id"])
+            self._log_change(endpoint, object_id, 'update', now)
+
+    def delete(self, endpoint: str, object_id: int):
+        """
+        Delete an object, logging the deletion
+
+        Args:
+            endpoint: Dataset key of the object
+            object_id: ID of the object
+        """
+        with self.lock:
+            obj = self.objects[endpoint].pop(object_id)
+            if endpoint == 'dcim/mac-addresses':
+                self._embed_mac(object_id, obj["assigned_object_id"], None)
+            self._log_change(endpoint, object_id, 'delete', _timestamp())
+
+    def interface_list(self, device_id: int, offset: int, limit: int,
+                       with_macs: bool) -> List[Dict]:
+        """
+        Answer the interface_list GraphQL query used by NetBoxAPI
+
+        Args:
+            device_id: Device filter
+            offset: Pagination offset
+            limit: Pagination limit
+            with_macs: Include nested mac_addresses
+
+        Returns:
+            Interfaces ordered by id with nested ip_addresses (and mac_addresses)
+        """
+        interfaces = sorted((interface for interface in self.objects['dcim/interfaces'].values()
+                             if interface["device"]["id"] == device_id), key=lambda row: row["id"])
+        page = interfaces[offset:offset + limit]
+        wanted = {interface["id"] for interface in page}
+        nested = {interface_id: {'ip_addresses': [], 'mac_addresses': []} for interface_id in wanted}
+        for field, endpoint, value_field in (('ip_addresses', 'ipam/ip-addresses', 'address'),
+                                             ('mac_addresses', 'dcim/mac-addresses', 'mac_address')):
+            for obj in self.objects[endpoint].values():
+                if obj["assigned_object_id"] in wanted:
+                    nested[obj["assigned_object_id"]][field].append(
+                        {"id": obj["id"], value_field: obj[value_field]})
+        results = []
+        for interface in page:
+            item = {"id": interface["id"], "name": interface["name"],
+                    "ip_addresses": nested[interface["id"]]['ip_addresses']}
+            if with_macs:
+                item["mac_addresses"] = nested[interface["id"]]['mac_addresses']
+            results.append(item)
+        return results
+
+    def device_id(self, endpoint: str, obj: Dict) -> Optional[int]:
+        """Device the object belongs to"""
+        if endpoint == 'dcim/devices':
+            return obj["id"]
+        if endpoint == 'dcim/interfaces':
+            return obj["device"]["id"]
+        interface = self.objects['dcim/interfaces'].get(obj["assigned_object_id"])
+        return interface["device"]["id"] if interface else None
+
+
+def _filter(data: FakeNetBoxData, endpoint: str, rows: List[Dict], query: Dict[str, List[str]]) -> List[Dict]:
+    """Apply the filters NetBox supports that the clients use"""
+    if 'device_id' in query:
+        devices = {int(value) for value in query['device_id']}
+        rows = [row for row in rows if data.device_id(endpoint, row) in devices]
+    if 'id' in query:
+        ids = {int(value) for value in query['id']}
+        rows = [row for row in rows if row["id"] in ids]
+    for lookup, compare in (('id__gt', int.__gt__), ('id__gte', int.__ge__),
+                            ('id__lt', int.__lt__), ('id__lte', int.__le__)):
+        if lookup in query:
+            bound = int(query[lookup][-1])
+            rows = [row for row in rows if compare(row["id"], bound)]
+    for lookup in ('site', 'role'):
+        if lookup in query and endpoint == 'dcim/devices':
+            slugs = set(query[lookup])
+            rows = [row for row in rows if row[lookup]["slug"] in slugs]
+    if 'tag' in query and endpoint == 'dcim/devices':
+        # Every given tag must be present, as in NetBox
+        tags = set(query['tag'])
+        rows = [row for row in rows if tags <= {tag["slug"] for tag in row["tags"]}]
+    for lookup, field in (('last_updated__gte', 'last_updated'), ('time_after', 'time')):
+        if lookup in query:
+            bound = _parse_time(query[lookup][-1])
+            rows = [row for row in rows if _parse_time(row[field]) >= bound]
+    return rows
+
+
+class FakeNetBoxServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering NetBox API requests from FakeNetBoxData"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], interface_count: int = 10000,
+                 version: str = "4.2.0", latency: float = 0.0, jitter: float = 0.0,
+                 shuffle: bool = False, capacity: int = 0, device_count: int = 1,
+                 write_latency: float = 0.0):
+        """
+        Initialize the server
+
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            interface_count: Number of interfaces on each device
+            version: NetBox version reported by /api/status/ (MAC addresses
+                are only served from 4.2.0)
+            latency: Seconds added to every response
+            jitter: Maximum random seconds added on top of latency
+            shuffle: Return rows in a different order on every request unless
+                'ordering' is given, like a query without a deterministic
+                ORDER BY; pages then overlap and skip rows
+            capacity: Requests served at the same time, like a fixed pool of
+                gunicorn workers (0 for unlimited). As many again wait in a
+                backlog; requests beyond that get 503 like from an
+                overloaded proxy
+            device_count: Number of devices
+            write_latency: Seconds between committing a write and
+                answering it, like a response lost after the commit
+        """
+        super().__init__(address, FakeNetBoxHandler)
+        self.version = version
+        self.latency = latency
+        self.jitter = jitter
+        self.shuffle = shuffle
+        self.write_latency = write_latency
+        self.capacity = capacity
+        self.workers = threading.Semaphore(capacity) if capacity else None
+        self.load = 0
+        self.load_lock = threading.Lock()
+        self.rejected = 0
+        with_macs = tuple(int(part) for part in version.split('.')[:2]) >= (4, 2)
+        self.data = FakeNetBoxData(self.url, interface_count, with_macs, device_count)
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up waiting (timeouts) are expected, not errors
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class FakeNetBoxHandler(BaseHTTPRequestHandler):
+    """Request handler for FakeNetBoxServer"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, small
+    # responses wait for the client's delayed ACK (~40ms per page)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body) -> None:
+        content = json.dumps(body).encode() if body is not None else b''
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _delay(self) -> None:
+        server = self.server
+        delay = server.latency + (random.uniform(0, server.jitter) if server.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+    def _handle(self, respond) -> None:
+        """Run a request handler within the server's capacity"""
+        server = self.server
+        if not server.capacity:
+            self._delay()
+            return respond()
+
+        with server.load_lock:
+            overloaded = server.load >= 2 * server.capacity
+            if overloaded:
+                server.rejected += 1
+            else:
+                server.load += 1
+        if overloaded:
+            return self._send_json(503, {"detail": "Service Unavailable"})
+        try:
+            with server.workers:
+                self._delay()
+                respond()
+        finally:
+            with server.load_lock:
+                server.load -= 1
+
+    def _endpoint(self, path: str) -> Optional[str]:
+        """Map a request path to a dataset key"""
+        endpoint = path[len('/api/'):].strip('/') if path.startswith('/api/') else None
+        return endpoint if endpoint in self.server.data.objects else None
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def do_PATCH(self):
+        self._handle(self._write)
+
+    def do_DELETE(self):
+        self._handle(self._write)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def _write(self):
+        """Create, update or delete IP and MAC addresses, one or a list at a time"""
+        path = urlsplit(self.path).path
+        match = re.fullmatch(r'/api/(.+?)/(?:(\d+)/?)?', path)
+        endpoint = match.group(1) if match else None
+        if endpoint not in WRITABLE:
+            return self._send_json(405, {"detail": f"Method \"{self.command}\" not allowed."})
+
+        data = self.server.data
+        body = self._read_json()
+        bulk = isinstance(body, list)
+        items = body if bulk else [dict(body or {}, id=int(match.group(2) or 0))]
+        if self.command != 'POST' and any(item.get('id') not in data.objects[endpoint] for item in items):
+            return self._send_json(404, {"detail": "No matching objects found."})
+
+        results = []
+        try:
+            for item in items:
+                if self.command == 'POST':
+                    item.pop('id', None)
+                    results.append(data.render(endpoint, data.create(endpoint, **item)))
+                elif self.command == 'PATCH':
+                    object_id = item.pop('id')
+                    data.update(endpoint, object_id, **item)
+                    results.append(data.render(endpoint, data.objects[endpoint][object_id]))
+                else:
+                    data.delete(endpoint, item['id'])
+        except KeyError:
+            # Deleted by a concurrent request since the check above
+            return self._send_json(404, {"detail": "No matching objects found."})
+        if self.server.write_latency:
+            time.sleep(self.server.write_latency)
+        if self.command == 'DELETE':
+            return self._send_json(204, None)
+        self._send_json(201 if self.command == 'POST' else 200, results if bulk else results[0])
+
+    def _get(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query, keep_blank_values=True)
+        data = self.server.data
+
+        if parts.path.rstrip('/') == '/api/status':
+            return self._send_json(200, {"netbox-version": self.server.version,
+                                         "python-version": "3.12.0", "plugins": {}})
+
+        endpoint = self._endpoint(parts.path)
+        if endpoint is None:
+            return self._send_json(404, {"detail": "Not found."})
+
+        with data.lock:
+            rows = _filter(data, endpoint, list(data.objects[endpoint].values()), query)
+            ordering = query.get('ordering', [None])[-1]
+            if ordering and ordering.lstrip('-') in ('id', 'time'):
+                field = ordering.lstrip('-')
+                rows.sort(key=lambda row: row[field], reverse=ordering.startswith('-'))
+            elif self.server.shuffle:
+                random.shuffle(rows)
+
+            count = len(rows)
+            limit = int(query.get('limit', [PAGINATE_COUNT])[-1]) or MAX_PAGE_SIZE
+            limit = min(limit, MAX_PAGE_SIZE)
+            offset = int(query.get('offset', [0])[-1])
+            fields = query['fields'][-1].split(',') if query.get('fields', [''])[-1] else None
+            brief = query.get('brief', ['false'])[-1].lower() in ('true', '1')
+            page = [data.render(endpoint, row, fields, brief) for row in rows[offset:offset + limit]]
+
+        def link(page_offset):
+            page_query = {key: values for key, values in query.items() if key not in ('limit', 'offset')}
+            page_query['limit'] = [str(limit)]
+            page_query['offset'] = [str(page_offset)]
+            return f"{self.server.url}{parts.path}?{urlencode(page_query, doseq=True)}"
+
+        self._send_json(200, {
+            "count": count,
+            "next": link(offset + limit) if offset + limit < count else None,
+            "previous": link(max(offset - limit, 0)) if offset > 0 else None,
+            "results": page
+        })
+
+    def _post(self):
+        if urlsplit(self.path).path.rstrip('/') != '/graphql':
+            return self._write()
+
+        request = self._read_json() or {}
+        query = request.get('query', '')
+        variables = request.get('variables') or {}
+        # Only the query NetBoxAPI.get_device_interfaces() sends is understood
+        device = re.search(r'device_id:\s*"?(\d+)', query)
+        if 'interface_list' not in query or device is None:
+            return self._send_json(200, {"data": None, "errors": [
+                {"message": "Only interface_list filtered by device_id is supported"}]})
+        with_macs = 'mac_addresses' in query
+        if with_macs and not self.server.data.with_macs:
+            return self._send_json(200, {"data": None, "errors": [
+                {"message": "Cannot query field 'mac_addresses' on type 'InterfaceType'."}]})
+
+        data = self.server.data
+        with data.lock:
+            interfaces = data.interface_list(int(device.group(1)), int(variables.get('offset', 0)),
+                                             min(int(variables.get('limit', 100)), MAX_PAGE_SIZE), with_macs)
+        self._send_json(200, {"data": {"interface_list": interfaces}})
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, **options) -> Tuple[FakeNetBoxServer, threading.Thread]:
+    """
+    Start a fake NetBox server on a background thread
+
+    Args:
+        host: Address to listen on
+        port: Port to listen on (0 picks a free port)
+        **options: Passed to FakeNetBoxServer
+
+    Returns:
+        The running server (its URL is server.url) and its thread
+    """
+    server = FakeNetBoxServer((host, port), **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake NetBox API for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--interfaces", type=int, default=10000, help="number of interfaces on each device")
+    parser.add_argument("--devices", type=int, default=1, help="number of devices, with IDs from 1")
+    parser.add_argument("--version", default="4.2.0", help="NetBox version reported by /api/status/")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum random seconds added to latency")
+    parser.add_argument("--shuffle", action="store_true", help="non-deterministic ordering unless ?ordering= is given")
+    parser.add_argument("--capacity", type=int, default=0, help="concurrent requests served (0 for unlimited)")
+    parser.add_argument("--write-latency", type=float, default=0.0, help="seconds between committing and answering a write")
+    args = parser.parse_args()
+
+    server = FakeNetBoxServer((args.host, args.port), interface_count=args.interfaces,
+                              version=args.version, latency=args.latency,
+                              jitter=args.jitter, shuffle=args.shuffle,
+                              capacity=args.capacity, device_count=args.devices,
+                              write_latency=args.write_latency)
+    print(f"Fake NetBox {args.version} with {args.devices} device(s) of {args.interfaces} interfaces on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,250 @@
+"""Incremental refresh of audit snapshots from last_updated and the changelog
+
+A full fetch stores a watermark in the snapshot: the time of the newest
+object change NetBox had logged when the fetch started. A refresh then only
+pulls the device's objects with last_updated at or after the watermark, and
+reads the changelog since the watermark to find objects that were deleted or
+moved to another device, so its cost follows the churn rather than the size
+of the device. Both times come from NetBox's clock, so client clock skew does
+not matter; a short overlap covers changes committed while a fetch ran.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import requests
+
+from audit import AddressTable, InterfaceTable
+from netbox import NetBoxAPI
+from snapshot import Snapshot
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Changelog endpoint of NetBox 4.1+; older releases use extras/object-changes/
+CHANGELOG_ENDPOINT = 'core/object-changes/'
+
+# Seconds re-read before the watermark, for changes that were logged before
+# it but committed after the previous fetch read the affected objects
+WATERMARK_OVERLAP = 60
+
+# Snapshot table, API endpoint and changelog object type of each dataset
+DATASETS = (
+    ('interfaces', 'dcim/interfaces/', 'dcim.interface'),
+    ('ip_addresses', 'ipam/ip-addresses/', 'ipam.ipaddress'),
+    ('mac_addresses', 'dcim/mac-addresses/', 'dcim.macaddress'),
+)
+
+# Interfaces requested per ?id= query when refetching by ID
+ID_CHUNK_SIZE = 100
+
+
+def _build_table(name: str, records: Iterable, with_macs: bool):
+    """Build the audit table for one dataset"""
+    if name == 'interfaces':
+        return InterfaceTable.from_records(records, with_macs=with_macs)
+    return AddressTable.from_records(records, 'address' if name == 'ip_addresses' else 'mac_address')
+
+
+def _parse_time(value: str) -> datetime:
+    """Parse a timestamp from the API (ISO 8601, possibly ending in Z)"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def latest_change(nb: NetBoxAPI, changelog_endpoint: str = CHANGELOG_ENDPOINT) -> Optional[str]:
+    """
+    Time of the newest entry in the changelog
+
+    Args:
+        nb: API client
+        changelog_endpoint: Object changes endpoint
+
+    Returns:
+        Timestamp as returned by the API, or None if the changelog is empty
+    """
+    page = next(nb.iter_pages(changelog_endpoint, {'ordering': '-time', 'limit': 1}, output='dict'), [])
+    return page[0]['time'] if page else None
+
+
+def fetch_snapshot(nb: NetBoxAPI, device_id: int, with_macs: bool,
+                   fields: Optional[Dict[str, List[str]]] = None,
+                   changelog_endpoint: Optional[str] = CHANGELOG_ENDPOINT,
+                   meta: Optional[Dict] = None) -> Snapshot:
+    """
+    Fetch every interface, IP and MAC address of a device into a snapshot
+
+    Args:
+        nb: API client
+        device_id: Device ID
+        with_macs: Fetch MAC addresses (NetBox 4.2+)
+        fields: Fields to request per endpoint (see audit.IPAM_AUDIT_FIELDS)
+        changelog_endpoint: Object changes endpoint (None to skip the
+            watermark when the snapshot will not be refreshed)
+        meta: Additional snapshot metadata
+
+    Returns:
+        Snapshot whose metadata holds the device ID and the watermark
+        for refresh_snapshot(). The watermark is None without a changelog
+        endpoint or when the changelog cannot be read (e.g. the token lacks
+        permission), in which case a refresh reads everything again.
+    """
+    fields = fields or {}
+    # Read the watermark first: anything changed during the fetch is newer
+    watermark = None
+    if changelog_endpoint is not None:
+        try:
+            watermark = latest_change(nb, changelog_endpoint)
+        except requests.HTTPError as e:
+            logger.warning("Cannot read the changelog (%s); the snapshot has no watermark", e)
+    tables = {}
+    for name, endpoint, _ in DATASETS:
+        if name == 'mac_addresses' and not with_macs:
+            continue
+        records = nb.get(endpoint, {'device_id': device_id}, fields=fields.get(endpoint))
+        tables[name] = _build_table(name, records, with_macs)
+    return Snapshot(tables['interfaces'], tables['ip_addresses'], tables.get('mac_addresses'),
+                    dict(meta or {}, device_id=device_id, watermark=watermark))
+
+
+def _changed_objects(nb: NetBoxAPI, changelog_endpoint: str,
+                     since: str) -> Tuple[Dict[str, Set[int]], Optional[str]]:
+    """
+    Read the changelog since a time
+
+    Returns:
+        IDs of the changed objects per object type, and the time of the
+        newest change (None if there were none)
+    """
+    changed = {}
+    newest = None
+    params = {'limit': 1000, 'time_after': since}
+    for change in nb.iter_results(changelog_endpoint, params, output='dict'):
+        object_type = change['changed_object_type']
+        # Serialized as 'dcim.interface', or as a nested object type by some releases
+        if isinstance(object_type, dict):
+            object_type = f"{object_type['app_label']}.{object_type['model']}"
+        changed.setdefault(object_type, set()).add(change['changed_object_id'])
+        if newest is None or _parse_time(change['time']) > _parse_time(newest):
+            newest = change['time']
+    return changed, newest
+
+
+def _fetch_by_ids(nb: NetBoxAPI, endpoint: str, device_id: int, ids: np.ndarray,
+                  fields: Optional[List[str]]) -> List:
+    """Fetch the objects of a device with the given IDs, a chunk at a time"""
+    records = []
+    ids = [int(object_id) for object_id in ids]
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        params = {'device_id': device_id, 'id': ids[start:start + ID_CHUNK_SIZE]}
+        records.extend(nb.get(endpoint, params, fields=fields))
+    return records
+
+
+def _full_refresh(nb: NetBoxAPI, snapshot: Snapshot, fields: Dict[str, List[str]],
+                  changelog_endpoint: str) -> Tuple[Snapshot, Dict]:
+    """Replace a snapshot with a full fetch, counting the rows it dropped"""
+    fresh = fetch_snapshot(nb, snapshot.meta['device_id'], snapshot.mac_addresses is not None,
+                           fields, changelog_endpoint, snapshot.meta)
+    stats = {}
+    for name, _, _ in DATASETS:
+        table = getattr(snapshot, name)
+        if table is not None:
+            new_ids = getattr(fresh, name).ids
+            stats[name] = {'fetched': len(new_ids), 'removed': int(np.isin(table.ids, new_ids, invert=True).sum())}
+    logger.info("Refreshed snapshot with a full fetch: %s", stats)
+    return fresh, stats
+
+
+def refresh_snapshot(nb: NetBoxAPI, snapshot: Snapshot,
+                     fields: Optional[Dict[str, List[str]]] = None,
+                     changelog_endpoint: str = CHANGELOG_ENDPOINT,
+                     overlap: float = WATERMARK_OVERLAP) -> Tuple[Snapshot, Dict]:
+    """
+    Bring a snapshot made by fetch_snapshot() up to date
+
+    Objects of the device with last_updated at or after the watermark replace
+    their cached rows. Objects in the changelog since the watermark that the
+    device no longer returns (deleted, or reassigned elsewhere) are dropped.
+    Interfaces embed their MAC addresses, so interfaces whose MAC addresses
+    changed are refetched too. A snapshot without a watermark, or a
+    changelog that cannot be read, gets a full fetch_snapshot() instead.
+
+    Args:
+        nb: API client
+        snapshot: Snapshot to refresh; not modified
+        fields: Fields to request per endpoint (see audit.IPAM_AUDIT_FIELDS)
+        changelog_endpoint: Object changes endpoint
+        overlap: Seconds to re-read before the watermark
+
+    Returns:
+        The refreshed snapshot and per-dataset counts of fetched and
+        removed objects
+
+    Raises:
+        ValueError: The snapshot has no device ID
+    """
+    fields = fields or {}
+    device_id = snapshot.meta.get('device_id')
+    watermark = snapshot.meta.get('watermark')
+    if device_id is None:
+        raise ValueError("snapshot has no device_id; make a full fetch first")
+
+    with_macs = snapshot.mac_addresses is not None
+    # Without a watermark (the changelog was empty or unreadable at the last
+    # fetch) deletions older than the changelog's retention cannot be seen
+    if watermark is None:
+        return _full_refresh(nb, snapshot, fields, changelog_endpoint)
+    since = (_parse_time(watermark) - timedelta(seconds=overlap)).isoformat()
+    try:
+        changed, newest = _changed_objects(nb, changelog_endpoint, since)
+    except requests.HTTPError as e:
+        logger.warning("Cannot read the changelog (%s); fetching everything again", e)
+        return _full_refresh(nb, snapshot, fields, changelog_endpoint)
+
+    fresh = {}
+    for name, endpoint, _ in DATASETS:
+        if getattr(snapshot, name) is None:
+            continue
+        params = {'device_id': device_id, 'last_updated__gte': since}
+        records = nb.get(endpoint, params, fields=fields.get(endpoint))
+        fresh[name] = _build_table(name, records, with_macs)
+
+    if with_macs:
+        # Interfaces that gained or lost a MAC address are not updated
+        # themselves: refetch the previous and current owners of every
+        # changed or deleted MAC address
+        macs = snapshot.mac_addresses
+        touched = np.union1d(fresh['mac_addresses'].ids,
+                             np.array(sorted(changed.get('dcim.macaddress', ())), dtype=np.int64))
+        moved = np.union1d(macs.object_ids[np.isin(macs.ids, touched)],
+                           fresh['mac_addresses'].object_ids)
+        moved = np.setdiff1d(moved[moved != 0], fresh['interfaces'].ids)
+        if len(moved):
+            records = _fetch_by_ids(nb, 'dcim/interfaces/', device_id, moved,
+                                    fields.get('dcim/interfaces/'))
+            extra = InterfaceTable.from_records(records, with_macs=True)
+            fresh['interfaces'] = fresh['interfaces'].updated(extra, [])
+
+    tables = {}
+    stats = {}
+    removed_interfaces = []
+    for name, _, object_type in DATASETS:
+        table = getattr(snapshot, name)
+        if table is None:
+            continue
+        # Changed objects the device no longer returns were deleted or moved away
+        removed = changed.get(object_type, set()).difference(fresh[name].ids.tolist())
+        if name == 'interfaces':
+            removed_interfaces = sorted(removed)
+        else:
+            # Addresses of removed interfaces left the device with them
+            removed.update(table.ids[np.isin(table.object_ids, removed_interfaces)].tolist())
+        tables[name] = table.updated(fresh[name], removed)
+        stats[name] = {'fetched': len(fresh[name]),
+                       'removed': int(np.isin(table.ids, list(removed)).sum())}
+
+    meta = dict(snapshot.meta, watermark=newest or watermark)
+    logger.info("Refreshed snapshot since %s: %s", since, stats)
+    return Snapshot(tables['interfaces'], tables['ip_addresses'], tables.get('mac_addresses'), meta), stats
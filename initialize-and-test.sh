@@ -5,6 +5,20 @@ set -e
 
 NETBOX_VERSION=${NETBOX_VERSION:-v4.1.5}
 
+# Matrix mode: space separated versions to set up and test side by side,
+# e.g. NETBOX_VERSIONS="v4.0.11 v4.1.5 v4.2.0 v4.3.3" ./initialize-and-test.sh
+NETBOX_VERSIONS=${NETBOX_VERSIONS:-}
+# Maximum number of versions running at the same time in matrix mode
+MATRIX_JOBS=${MATRIX_JOBS:-2}
+# Host port of the first matrix version, later versions count up from it
+MATRIX_BASE_PORT=${MATRIX_BASE_PORT:-8081}
+# Set to 1 to leave the matrix stacks running after their tests
+MATRIX_KEEP=${MATRIX_KEEP:-0}
+# API token the superuser is created with (see docker-compose.yml)
+SUPERUSER_API_TOKEN=${SUPERUSER_API_TOKEN:-0123456789abcdef0123456789abcdef01234567}
+# Seconds to wait for NetBox to answer before giving up
+READY_TIMEOUT=${READY_TIMEOUT:-600}
+
 # Test for all required programs
 if ! command -v docker &> /dev/null; then
     echo "docker could not be found"
@@ -26,11 +40,134 @@ if ! command -v curl &> /dev/null; then
     exit 1
 fi
 
-echo "Stopping NetBox docker compose stack..."
-docker compose down
-
-echo "Cleaning up previous volumes..."
-docker volume rm $(basename $PWD)_postgresql > /dev/null 2>&1 || true
+# docker compose for one stack: stack_compose PROJECT VERSION PORT ARGS...
+# An empty PROJECT uses the default project (the directory name)
+stack_compose() {
+    local project=$1 version=$2 port=$3
+    shift 3
+    if [ -n "$project" ]; then
+        NETBOX_VERSION=$version NETBOX_PORT=$port SUPERUSER_API_TOKEN=$SUPERUSER_API_TOKEN \
+            docker compose -p "$project" "$@"
+    else
+        NETBOX_VERSION=$version NETBOX_PORT=$port SUPERUSER_API_TOKEN=$SUPERUSER_API_TOKEN \
+            docker compose "$@"
+    fi
+}
+
+# Start a stack with an empty database: start_stack PROJECT VERSION PORT
+start_stack() {
+    echo "Stopping NetBox docker compose stack and removing its volumes..."
+    stack_compose "$1" "$2" "$3" down --volumes
+
+    echo "Starting NetBox docker compose stack..."
+    stack_compose "$1" "$2" "$3" up -d
+}
+
+# HTTP status of /api/status/ with a token (000 if unreachable): status_code URL TOKEN
+status_code() {
+    curl --output /dev/null --silent --max-time 5 --write-out '%{http_code}' \
+        --header "Authorization: Token $2" "$1/api/status/" || true
+}
+
+# Wait until the NetBox API answers, polling /api/status/ with exponential
+# backoff (0.25s doubling up to 4s): wait_for_netbox URL
+wait_for_netbox() {
+    local delay=0.25 started=$SECONDS code
+    echo "Please wait for NetBox to be available on $1... This could take a minute."
+    while true; do
+        code=$(status_code "$1" "$SUPERUSER_API_TOKEN")
+        # Any answer from Django (even 403 for a token that is not valid
+        # yet) means the API is up; 000 and 5xx come from a stack still starting
+        if [ "$code" != "000" ] && [ "${code:0:1}" != "5" ]; then
+            break
+        fi
+        if [ $((SECONDS - started)) -ge "$READY_TIMEOUT" ]; then
+            echo -e "\nNetBox did not answer within ${READY_TIMEOUT}s"
+            return 1
+        fi
+        printf '.'
+        sleep "$delay"
+        delay=$(awk -v d="$delay" 'BEGIN { d *= 2; print (d > 4 ? 4 : d) }')
+    done
+    echo -e "\nNetBox is up and running after $((SECONDS - started))s!"
+}
+
+# Print an API token for admin: get_token URL
+# Uses the token the superuser was created with when NetBox accepts it, and
+# otherwise provisions one through the API with the superuser's password
+get_token() {
+    local response token
+    if [ "$(status_code "$1" "$SUPERUSER_API_TOKEN")" = "200" ]; then
+        echo "$SUPERUSER_API_TOKEN"
+        return 0
+    fi
+
+    response=$(curl --silent --max-time 30 --header "Content-Type: application/json" \
+        --data '{"username": "admin", "password": "netbox"}' "$1/api/users/tokens/provision/")
+    token=$(echo "$response" | python3 -c "import json, sys; print(json.load(sys.stdin).get('key', ''))" 2>/dev/null || true)
+
+    if [ -z "$token" ]; then
+        echo "Failed to provision an API token:" >&2
+        echo "$response" >&2
+        return 1
+    fi
+    echo "$token"
+}
+
+# Seed and test a running stack: seed_and_test VERSION URL TOKEN
+seed_and_test() {
+    local version=$1
+    export NETBOX_URL=$2 NETBOX_TOKEN=$3
+
+    echo "Inserting dummy data..."
+    ./insert_dummy_data.py
+
+    # NETBOX_PROFILE=1 writes a profile of the test next to its output
+    local profile=""
+    if [ "${NETBOX_PROFILE:-0}" != "0" ]; then
+        profile=test_profile_${version}.json
+    fi
+
+    echo "Testing IPAM..."
+    NETBOX_PROFILE=$profile NETBOX_SNAPSHOT=snapshot_${version} ./test-ipam.py > test_output_${version}.txt
+
+    echo "Test complete!"
+    echo "Test output saved to test_output_${version}.txt"
+    if [ -n "$profile" ]; then
+        echo "Profile saved to $profile (compare runs with ./profile-report.py)"
+    fi
+    echo "Snapshot saved to snapshot_${version} (compare runs with ./snapshot.py diff)"
+}
+
+# Full cycle for one matrix version: run_version VERSION PORT PROJECT
+run_version() {
+    local version=$1 port=$2 project=$3 token
+    start_stack "$project" "$version" "$port"
+    wait_for_netbox "http://localhost:$port"
+    echo "Getting API token..."
+    token=$(get_token "http://localhost:$port")
+    seed_and_test "$version" "http://localhost:$port" "$token"
+    if [ "$MATRIX_KEEP" != "1" ]; then
+        echo "Removing NetBox docker compose stack..."
+        stack_compose "$project" "$version" "$port" down --volumes
+    fi
+}
+
+# Run one matrix version and record its outcome in matrix_logs/VERSION.status
+run_matrix_version() {
+    local version=$1 port=$2
+    local project="netbox-matrix-$(echo "$version" | tr -c 'a-zA-Z0-9\n' '-' | tr 'A-Z' 'a-z')"
+    local started=$SECONDS result bugs
+
+    rm -f "test_output_${version}.txt"
+    # Run as a background job so 'set -e' stops this version only
+    run_version "$version" "$port" "$project" > "matrix_logs/${version}.log" 2>&1 &
+    if wait $!; then result=ok; else result=failed; fi
+
+    bugs=$(grep -c '^BUG' "test_output_${version}.txt" 2>/dev/null || true)
+    echo "$result ${bugs:-0} $((SECONDS - started)) $port" > "matrix_logs/${version}.status"
+    echo "$version: $result after $((SECONDS - started))s (${bugs:-0} BUG lines, log in matrix_logs/${version}.log)"
+}
 
 echo "Creating venv..."
 python3 -m venv venv
@@ -41,42 +178,53 @@ source venv/bin/activate
 echo "Installing requirements..."
 pip3 install -r requirements.txt
 
-echo "Starting NetBox docker compose stack..."
-docker compose up -d
-
-echo "Please wait for NetBox to be available on localhost:8080... This could take a minute."
-until $(curl --output /dev/null --silent --head --fail http://localhost:8080); do
-    printf '.'
-    sleep 5
-done
-
-echo -e "\nNetBox is up and running!"
-
-echo "Creating API token..."
-TOKEN_OUTPUT=$(docker compose exec netbox python /opt/netbox/netbox/manage.py nbshell -c "from users.models import Token, User; admin=User.objects.get(username='admin'); token=Token.objects.create(user=admin); print(f'Token created: {token.key}')")
-TOKEN=$(echo "$TOKEN_OUTPUT" | grep "Token created:" | awk '{print $3}')
-
-if [ -z "$TOKEN" ]; then
-    echo "Failed to extract token from output:"
-    echo "$TOKEN_OUTPUT"
-    exit 1
-fi
+if [ -z "$NETBOX_VERSIONS" ]; then
+    start_stack "" "$NETBOX_VERSION" 8080
+    wait_for_netbox "http://localhost:8080"
 
-echo "Token successfully created: $TOKEN"
+    echo "Getting API token..."
+    TOKEN=$(get_token "http://localhost:8080")
+    echo "Token ready: $TOKEN"
 
-# Create .env file
-echo "Creating .env file..."
-cat > .env << EOL
+    # Create .env file
+    echo "Creating .env file..."
+    cat > .env << EOL
 NETBOX_URL=http://localhost:8080
 NETBOX_TOKEN=$TOKEN
 EOL
 
-echo "Setup complete! Environment file created with NetBox URL and token."
-echo "Inserting dummy data..."
-./insert_dummy_data.py
-
-echo "Testing IPAM..."
-./test-ipam.py > test_output_${NETBOX_VERSION}.txt
+    echo "Setup complete! Environment file created with NetBox URL and token."
+    seed_and_test "$NETBOX_VERSION" "http://localhost:8080" "$TOKEN"
+    exit 0
+fi
 
-echo "Test complete!"
-echo "Test output saved to test_output_${NETBOX_VERSION}.txt"
+# Matrix mode: every version gets its own compose project (and so its own
+# containers and database volume) on its own port
+mkdir -p matrix_logs
+echo "Testing NetBox versions $NETBOX_VERSIONS, $MATRIX_JOBS at a time..."
+port=$MATRIX_BASE_PORT
+for version in $NETBOX_VERSIONS; do
+    while [ "$(jobs -rp | wc -l)" -ge "$MATRIX_JOBS" ]; do
+        wait -n || true
+    done
+    echo "$version: starting on port $port"
+    run_matrix_version "$version" "$port" &
+    port=$((port + 1))
+done
+wait
+
+# Combined report
+{
+    printf "%-12s %-8s %6s %8s %6s  %s\n" version result bugs seconds port output
+    for version in $NETBOX_VERSIONS; do
+        read -r result bugs seconds port < "matrix_logs/${version}.status"
+        printf "%-12s %-8s %6s %8s %6s  %s\n" "$version" "$result" "$bugs" "$seconds" "$port" "test_output_${version}.txt"
+    done
+} > matrix_report.txt
+
+echo
+cat matrix_report.txt
+echo "Report saved to matrix_report.txt"
+if grep -q " failed " matrix_report.txt; then
+    exit 1
+fi
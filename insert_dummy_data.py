@@ -3,29 +3,37 @@
 from dotenv import load_dotenv
 import os
 import pynetbox
+import requests
+from netbox import AdaptiveConcurrency, NetBoxAPI, BulkWriter, BulkWriteError, is_version_above
 
 load_dotenv()
 
-INTERFACE_COUNT = 10000
+INTERFACE_COUNT = int(os.getenv("INTERFACE_COUNT", 10000))
+
+# Objects per bulk request and number of requests in flight
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 500))
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", 4))
+# Set BULK_ADAPTIVE=1 to let the number of requests in flight adapt to how
+# the server copes, with BULK_WORKERS as the upper bound
+BULK_ADAPTIVE = os.getenv("BULK_ADAPTIVE") == "1"
 
 nb = pynetbox.api(
     url=os.getenv("NETBOX_URL"),
     token=os.getenv("NETBOX_TOKEN")
 )
 
-# Function to check if NetBox version is above a specified version
-def is_version_above(current_version, min_version):
-    current_parts = [int(x) for x in current_version.split('.')]
-    min_parts = [int(x) for x in min_version.split('.')]
-    
-    for i in range(max(len(current_parts), len(min_parts))):
-        current = current_parts[i] if i < len(current_parts) else 0
-        minimum = min_parts[i] if i < len(min_parts) else 0
-        if current > minimum:
-            return True
-        elif current < minimum:
-            return False
-    return True
+# Bulk writes go through the raw client so they can be chunked and run concurrently
+api = NetBoxAPI(
+    url=os.getenv("NETBOX_URL"),
+    token=os.getenv("NETBOX_TOKEN"),
+    pool_maxsize=BULK_WORKERS,
+    concurrency=AdaptiveConcurrency(initial=min(4, BULK_WORKERS), maximum=BULK_WORKERS) if BULK_ADAPTIVE else None
+)
+writer = BulkWriter(api, chunk_size=BULK_CHUNK_SIZE, max_workers=BULK_WORKERS)
+
+def write_rate():
+    stats = writer.last_stats
+    return f"in {stats['elapsed']:.1f}s ({stats['rate']:.0f} objects/s)"
 
 status = nb.status()
 netbox_version = status["netbox-version"]
@@ -106,7 +114,7 @@ except Exception as e:
     print(f"Failed to create device: {e}")
     exit(1)
 
-# Create 500 interfaces in bulk
+# Create interfaces in bulk
 interface_data = []
 for i in range(INTERFACE_COUNT):
     interface_data.append({
@@ -117,20 +125,34 @@ for i in range(INTERFACE_COUNT):
 
 print(f"Creating {len(interface_data)} interfaces...")
 try:
-    interfaces = nb.dcim.interfaces.create(interface_data)
-    print(f"Created {len(interfaces)} interfaces")
-except pynetbox.core.query.RequestError as e:
+    interfaces = writer.create("dcim/interfaces/", interface_data)
+    print(f"Created {len(interfaces)} interfaces {write_rate()}")
+except BulkWriteError as e:
     print(f"Error creating interfaces: {e}")
-    # If bulk creation fails, try to get existing interfaces
-    interfaces = []
-    for i in range(INTERFACE_COUNT):
+    # If bulk creation fails, index the device's existing interfaces by name
+    # in one paginated pull and create only the ones that are missing
+    try:
+        interfaces_by_name = {
+            interface.name: interface
+            for interface in api.iter_results("dcim/interfaces/", {"device_id": device.id, "limit": 1000}, cursor=True)
+        }
+    except requests.RequestException as e:
+        print(f"Failed to fetch existing interfaces: {e}")
+        exit(1)
+    print(f"Found {len(interfaces_by_name)} existing interfaces")
+
+    missing_interfaces = [data for data in interface_data if data["name"] not in interfaces_by_name]
+    if missing_interfaces:
+        print(f"Creating {len(missing_interfaces)} missing interfaces...")
         try:
-            interface = nb.dcim.interfaces.get(device_id=device.id, name=f"dummy{i}")
-            if interface:
-                interfaces.append(interface)
-        except:
-            pass
-    print(f"Found {len(interfaces)} existing interfaces")
+            created = writer.create("dcim/interfaces/", missing_interfaces)
+            print(f"Created {len(created)} interfaces {write_rate()}")
+        except BulkWriteError as e:
+            print(f"Error creating missing interfaces: {e}")
+            created = e.completed
+        interfaces_by_name.update((interface.name, interface) for interface in created)
+
+    interfaces = [interfaces_by_name[data["name"]] for data in interface_data if data["name"] in interfaces_by_name]
 
 if not interfaces:
     print("No interfaces to assign IP addresses to")
@@ -152,9 +174,9 @@ for interface in interfaces:
 # Create the same IP address for all interfaces in bulk
 print(f"Creating {len(ip_data)} IP addresses for {len(interfaces)} interfaces...")
 try:
-    ip_addresses = nb.ipam.ip_addresses.create(ip_data)
-    print(f"Created {len(ip_addresses)} IP addresses")
-except pynetbox.core.query.RequestError as e:
+    ip_addresses = writer.create("ipam/ip-addresses/", ip_data)
+    print(f"Created {len(ip_addresses)} IP addresses {write_rate()}")
+except BulkWriteError as e:
     print(f"Error creating IP addresses: {e}")
 
 # Create MAC addresses for all interfaces in bulk
@@ -169,26 +191,27 @@ for interface in interfaces:
 if is_version_above(netbox_version, "4.2.0"):
     print(f"Creating {len(mac_data)} MAC addresses for {len(interfaces)} interfaces...")
     try:
-        mac_addresses = nb.dcim.mac_addresses.create(mac_data)
-        print(f"Created {len(mac_addresses)} MAC addresses")
-    except pynetbox.core.query.RequestError as e:
+        mac_addresses = writer.create("dcim/mac-addresses/", mac_data)
+        print(f"Created {len(mac_addresses)} MAC addresses {write_rate()}")
+    except BulkWriteError as e:
         print(f"Error creating MAC addresses: {e}")
-        mac_addresses = []
+        # Chunks that were written can still be set as primary
+        mac_addresses = e.completed
 
     # Set MAC addresses as primary for their interfaces
     if mac_addresses:
         print(f"Setting primary MAC addresses for interfaces...")
         interfaces_to_update = []
         
-        for interface, mac in zip(interfaces, mac_addresses):
+        for mac in mac_addresses:
             interfaces_to_update.append({
-                'id': interface.id,
+                'id': mac.assigned_object_id,
                 'primary_mac_address': mac.id
             })
         
         try:
-            updated_interfaces = nb.dcim.interfaces.update(interfaces_to_update)
-            print(f"Updated {len(updated_interfaces)} interfaces with primary MAC addresses")
-        except pynetbox.core.query.RequestError as e:
+            updated_interfaces = writer.update("dcim/interfaces/", interfaces_to_update)
+            print(f"Updated {len(updated_interfaces)} interfaces with primary MAC addresses {write_rate()}")
+        except BulkWriteError as e:
             print(f"Error setting primary MAC addresses: {e}")
 
@@ -1,6 +1,61 @@
+import asyncio
+import bisect
+import cProfile
+import io
+import os
+import pstats
 import requests
 import json
-from typing import Dict, List, Optional, Any
+import logging
+import platform
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.retry import Retry
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Use the fast orjson decoder when it is installed
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+json_loads = orjson.loads if orjson is not None else json.loads
+
+# Result types accepted by the output argument of get() and iter_pages()
+OUTPUT_TYPES = ('record', 'dict', 'bytes')
+
+# Interfaces of one device with their IP and MAC addresses, one page per
+# request. The device filter is inlined because the type of its argument
+# differs between NetBox releases ([String] before 4.3, ID after).
+GRAPHQL_INTERFACES_QUERY = """
+query DeviceInterfaces($offset: Int!, $limit: Int!) {
+  interface_list(filters: {device_id: "%d"}, pagination: {offset: $offset, limit: $limit}) {
+    id
+    name
+    ip_addresses { id address }%s
+  }
+}
+"""
+
+# Request tracing is logged at DEBUG and call summaries at INFO; nothing is
+# emitted unless the application configures logging
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
 
 class DotDict:
@@ -31,97 +86,1156 @@ class DotDict:
         return hasattr(self, key)
 
 
+def _wrap(value):
+    """Wrap nested dictionaries (and lists of them) in Record objects"""
+    if isinstance(value, dict):
+        return Record(value)
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        return [Record(item) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+class Record:
+    """Lazy, read-only attribute view over a decoded JSON object
+    
+    Unlike DotDict the wrapped dictionary is not copied; nested objects are
+    wrapped only when they are accessed. Attribute names map to keys as-is
+    or, failing that, to the key whose hyphens read as underscores (so
+    'x_y-z' is x_y_z), as DotDict named its attributes.
+    """
+    
+    __slots__ = ('_data', '_nested')
+    
+    def __init__(self, data: Dict):
+        """
+        Initialize Record around dictionary data
+        
+        Args:
+            data: Decoded JSON object to wrap
+        """
+        self._data = data
+        self._nested = None
+    
+    def _key(self, key):
+        """Return the key of the wrapped dictionary that key names, raising KeyError if none"""
+        data = self._data
+        if key in data:
+            return key
+        if isinstance(key, str) and '_' in key:
+            hyphenated = key.replace('_', '-')
+            if hyphenated in data:
+                return hyphenated
+            # Keys mixing both, such as 'x_y-z'
+            for candidate in data:
+                if isinstance(candidate, str) and '-' in candidate and candidate.replace('-', '_') == key:
+                    return candidate
+        raise KeyError(key)
+    
+    def _lookup(self, key):
+        """Return the wrapped value for key, raising KeyError if missing"""
+        data = self._data
+        try:
+            value = data[key]
+        except KeyError:
+            key = self._key(key)
+            value = data[key]
+        if not isinstance(value, (dict, list)):
+            return value
+        # Wrap nested objects once, on first access
+        nested = self._nested
+        if nested is None:
+            nested = self._nested = {}
+        elif key in nested:
+            return nested[key]
+        value = nested[key] = _wrap(value)
+        return value
+    
+    def __getattr__(self, name):
+        # Never resolve special names or the unset slot (e.g. while unpickling)
+        if name.startswith('__') or name in Record.__slots__:
+            raise AttributeError(name)
+        try:
+            return self._lookup(name)
+        except KeyError:
+            raise AttributeError(name) from None
+    
+    def __getitem__(self, key):
+        try:
+            return self._lookup(key)
+        except KeyError:
+            raise KeyError(key) from None
+    
+    def __contains__(self, key):
+        try:
+            self._key(key)
+        except KeyError:
+            return False
+        return True
+    
+    def __repr__(self):
+        return f"Record({self._data!r})"
+
+
+@dataclass
+class RequestEvent:
+    """Metrics for a single API request, passed to the on_request callback"""
+    method: str
+    url: str
+    status: int
+    elapsed: float
+    bytes: int
+    items: Optional[int] = None
+    page: Optional[int] = None
+
+
+@dataclass
+class PageRepair:
+    """What NetBoxAPI.get(repair=True) found and fixed in a paginated pull"""
+    count: int
+    duplicates: int = 0
+    missing: int = 0
+    removed: int = 0
+    requests: int = 0
+    reconciled: bool = True
+
+
+def _emit(callback: Optional[Callable[[RequestEvent], None]], event: RequestEvent):
+    """Pass an event to the metrics callback without letting it break the request"""
+    if callback is None:
+        return
+    try:
+        callback(event)
+    except Exception:
+        logger.exception("on_request callback failed")
+
+
+def _convert_page(data: Dict, content: bytes, output: str) -> List:
+    """Convert the results of one decoded page into the requested output type"""
+    if output == 'bytes':
+        return [content]
+    if output == 'dict':
+        return data['results']
+    return [Record(item) for item in data['results']]
+
+
+def _convert_single(data: Dict, content: bytes, output: str) -> Any:
+    """Convert a non-paginated response into the requested output type"""
+    if output == 'bytes':
+        return content
+    if output == 'dict':
+        return data
+    return Record(data)
+
+
+def _field_params(params: Optional[Dict], brief: bool = False,
+                  fields: Optional[List[str]] = None,
+                  exclude: Optional[List[str]] = None) -> Dict:
+    """
+    Add field selection options to query parameters
+    
+    Args:
+        params: Query parameters (not modified)
+        brief: Request NetBox's brief representation of each object
+        fields: Only return these fields (?fields=, NetBox 4.0+)
+        exclude: Leave out these fields (?exclude=, e.g. config_context)
+        
+    Returns:
+        New query parameters including the field selection
+    """
+    params = dict(params or {})
+    if brief:
+        params['brief'] = 'true'
+    if fields:
+        params['fields'] = fields if isinstance(fields, str) else ','.join(fields)
+    if exclude:
+        params['exclude'] = exclude if isinstance(exclude, str) else ','.join(exclude)
+    return params
+
+
+def _with_id(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """Add 'id' to a field selection, for paging or reconciling by id"""
+    if not fields:
+        return fields
+    fields = fields.split(',') if isinstance(fields, str) else list(fields)
+    if 'id' not in fields:
+        fields.append('id')
+    return fields
+
+
+def _check_output(output: str):
+    """Raise ValueError for an unknown output type"""
+    if output not in OUTPUT_TYPES:
+        raise ValueError(f"output must be one of {', '.join(OUTPUT_TYPES)}, not {output!r}")
+
+
+# Responses that indicate an overloaded or restarting server
+OVERLOAD_STATUS = (429, 502, 503, 504)
+
+
+def _retry_after(response: Optional[requests.Response]) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if the response has one"""
+    if response is None:
+        return None
+    retry_after = response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return None
+
+
+def _not_sent(error: Exception) -> bool:
+    """Whether a request failed before any of it reached the server"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or isinstance(error, requests.Timeout):
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason is the real error
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', reason)
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+def _backoff_delay(backoff_factor: float, attempt: int) -> float:
+    """Exponential backoff with jitter, so retrying clients do not move in lockstep"""
+    delay = backoff_factor * (2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def is_version_above(current_version: str, min_version: str) -> bool:
+    """
+    Check whether a NetBox version is at least a minimum version
+
+    Args:
+        current_version: Version reported by /api/status/ (e.g. '4.2.0')
+        min_version: Minimum version (e.g. '4.0.0')
+
+    Returns:
+        True if current_version is min_version or newer
+    """
+    current_parts = [int(x) for x in current_version.split('.')]
+    min_parts = [int(x) for x in min_version.split('.')]
+
+    for i in range(max(len(current_parts), len(min_parts))):
+        current = current_parts[i] if i < len(current_parts) else 0
+        minimum = min_parts[i] if i < len(min_parts) else 0
+        if current > minimum:
+            return True
+        elif current < minimum:
+            return False
+    return True
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on the number of requests a client has in flight
+    
+    Each response that is neither an overload (429/502/503/504, timeout,
+    connection error) nor much slower than the fastest recent response
+    raises the limit by 1/limit, or about one per round of requests. An
+    overload or slow response cuts it by the decrease factor, at most once
+    per cooldown (by default about one round trip) so that a burst of
+    concurrent failures counts once.
+    Retry-After pauses every new request until it has passed. Latency is
+    compared per request kind (method and endpoint), since a status call,
+    a page and a bulk write take very different times.
+    
+    One instance can be shared by several clients talking to the same
+    server, so that all of them back off together.
+    """
+    
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 16,
+                 decrease: float = 0.5, latency_factor: float = 3.0,
+                 cooldown: Optional[float] = None):
+        """
+        Initialize AdaptiveConcurrency
+        
+        Args:
+            initial: Starting limit
+            minimum: Lowest limit
+            maximum: Highest limit
+            decrease: Factor applied to the limit on overload
+            latency_factor: Responses slower than this multiple of the
+                baseline latency count as overload (0 to ignore latency)
+            cooldown: Minimum seconds between two decreases (None for
+                twice the average response time)
+        """
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        # Fastest recent response time per request kind; drifts up slowly so
+        # that a server that became slower for good is not seen as
+        # overloaded forever
+        self.baselines: Dict[str, float] = {}
+        # Moving average of response times, for the default cooldown
+        self.average = None
+        self.stats = {'requests': 0, 'overloaded': 0, 'slow': 0, 'decreases': 0}
+        self._condition = threading.Condition()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+    
+    def acquire(self):
+        """Wait for a free slot under the current limit (and any pause)"""
+        with self._condition:
+            while True:
+                wait = self._paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                self._condition.wait(wait if wait > 0 else None)
+            self.in_flight += 1
+    
+    def release(self, elapsed: Optional[float], overloaded: bool, kind: str = ''):
+        """
+        Free a slot and adjust the limit from the outcome of the request
+        
+        Args:
+            elapsed: Response time in seconds (None when there was no response)
+            overloaded: The request failed in a way that indicates overload
+            kind: Request kind whose baseline latency elapsed is compared
+                to (e.g. 'GET /api/dcim/interfaces/')
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self.stats['requests'] += 1
+            slow = False
+            if elapsed is not None:
+                self.average = elapsed if self.average is None else self.average + (elapsed - self.average) * 0.1
+            if elapsed is not None and not overloaded:
+                baseline = self.baselines.get(kind)
+                if baseline is None or elapsed < baseline:
+                    baseline = elapsed
+                else:
+                    baseline += (elapsed - baseline) * 0.01
+                self.baselines[kind] = baseline
+                slow = bool(self.latency_factor) and elapsed > self.latency_factor * baseline
+            
+            if overloaded or slow:
+                self.stats['overloaded' if overloaded else 'slow'] += 1
+                now = time.monotonic()
+                cooldown = self.cooldown if self.cooldown is not None else 2 * (self.average or 0.0)
+                if now - self._last_decrease >= cooldown:
+                    self._last_decrease = now
+                    self.limit = max(float(self.minimum), self.limit * self.decrease)
+                    self.stats['decreases'] += 1
+                    logger.debug("Concurrency limit cut to %d (%s)", int(self.limit),
+                                 "overload" if overloaded else f"{elapsed:.3f}s response")
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+    
+    def pause(self, seconds: float):
+        """Hold back new requests for the given number of seconds"""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+
+class Profiler:
+    """Opt-in wall time, CPU time and memory profile of a run
+    
+    phase() measures a named block: wall and CPU time, and with memory
+    profiling the peak of traced memory above what was allocated when the
+    block started. Phases may be nested (e.g. a GET inside a fetch phase)
+    and repeated; repeated phases are summed. add() accumulates timings of
+    hot paths that are too frequent for tracemalloc, like the request,
+    JSON decode and Record conversion of every page.
+    
+    CPU time is process-wide, so it includes worker threads. tracemalloc is
+    process-wide too: phases running at the same time on several threads
+    see each other's allocations. cProfile only sees the thread that called
+    start().
+    
+    A disabled profiler does nothing, so scripts can wrap their phases
+    unconditionally and leave the choice to the environment (see from_env()).
+    """
+    
+    def __init__(self, enabled: bool = True, memory: bool = True, cprofile: bool = False,
+                 path: Optional[str] = None):
+        """
+        Initialize Profiler
+        
+        Args:
+            enabled: Measure anything at all
+            memory: Trace allocations with tracemalloc (slows Python code
+                down noticeably, so compare timings with it off)
+            cprofile: Collect a cProfile profile between start() and stop()
+            path: Default report path for save()
+        """
+        self.enabled = enabled
+        self.path = path
+        self.memory = memory and enabled
+        self.cprofile = cProfile.Profile() if cprofile and enabled else None
+        self.meta = {}
+        self.phases = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._open = []
+        self._started = None
+        self._wall = 0.0
+        self._cpu = 0.0
+        self._peak = 0
+    
+    @classmethod
+    def from_env(cls, default_path: str = 'test_profile.json') -> 'Profiler':
+        """
+        Build and start a profiler as configured by the environment
+        
+        NETBOX_PROFILE enables profiling: '1' writes the report to
+        default_path, anything else is the report path. NETBOX_PROFILE_MEMORY=0
+        turns off tracemalloc and NETBOX_PROFILE_CPROFILE=1 adds a cProfile
+        profile.
+        
+        Args:
+            default_path: Report path for NETBOX_PROFILE=1
+            
+        Returns:
+            A started Profiler, disabled unless NETBOX_PROFILE is set
+        """
+        setting = os.getenv('NETBOX_PROFILE', '')
+        profiler = cls(enabled=setting not in ('', '0'),
+                       memory=os.getenv('NETBOX_PROFILE_MEMORY', '1') != '0',
+                       cprofile=os.getenv('NETBOX_PROFILE_CPROFILE') == '1',
+                       path=default_path if setting == '1' else setting)
+        profiler.start()
+        return profiler
+    
+    def start(self):
+        """Start tracing memory and cProfile (if enabled) and the run clock"""
+        if not self.enabled:
+            return
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._started = (time.perf_counter(), time.process_time())
+        if self.cprofile is not None:
+            self.cprofile.enable()
+    
+    def stop(self):
+        """Stop the run clock, cProfile and memory tracing"""
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if self._started is not None:
+            self._wall += time.perf_counter() - self._started[0]
+            self._cpu += time.process_time() - self._started[1]
+            self._started = None
+        if self.memory and tracemalloc.is_tracing():
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    
+    def _flush_peak(self):
+        """Credit the traced peak so far to every open phase, then reset it"""
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peak = max(self._peak, peak)
+        for frame in self._open:
+            frame['peak'] = max(frame['peak'], peak)
+        tracemalloc.reset_peak()
+    
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Measure a block of code
+        
+        Args:
+            name: Phase name, e.g. 'fetch' or 'GET ipam/ip-addresses/'
+        """
+        if not self.enabled:
+            yield
+            return
+        tracing = self.memory and tracemalloc.is_tracing()
+        frame = {'peak': 0, 'start': 0}
+        if tracing:
+            with self._lock:
+                self._flush_peak()
+                frame['start'] = frame['peak'] = tracemalloc.get_traced_memory()[0]
+                self._open.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            with self._lock:
+                if tracing:
+                    self._flush_peak()
+                    self._open.remove(frame)
+                stats = self.phases.setdefault(name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+                stats['calls'] += 1
+                stats['wall'] += wall
+                stats['cpu'] += cpu
+                if tracing:
+                    stats['peak_bytes'] = max(stats.get('peak_bytes', 0), frame['peak'] - frame['start'])
+    
+    def add(self, name: str, wall: float, cpu: Optional[float] = None, **counts: int):
+        """
+        Accumulate a timing measured by the caller
+        
+        Args:
+            name: Counter name, e.g. 'decode'
+            wall: Wall time in seconds
+            cpu: CPU time in seconds of the measuring thread
+            **counts: Further totals, e.g. bytes=len(content)
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.counters.setdefault(name, {'calls': 0, 'wall': 0.0})
+            stats['calls'] += 1
+            stats['wall'] += wall
+            if cpu is not None:
+                stats['cpu'] = stats.get('cpu', 0.0) + cpu
+            for key, value in counts.items():
+                stats[key] = stats.get(key, 0) + value
+    
+    def report(self, top: int = 30) -> Dict:
+        """
+        Collect the profile as a JSON-serialisable dictionary
+        
+        Args:
+            top: Functions to list from cProfile, by cumulative time
+            
+        Returns:
+            Run totals, phases, counters, metadata and (with cProfile) the
+            top functions
+        """
+        wall, cpu = self._wall, self._cpu
+        if self._started is not None:
+            wall += time.perf_counter() - self._started[0]
+            cpu += time.process_time() - self._started[1]
+        peak = self._peak
+        if self.memory and tracemalloc.is_tracing():
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        report = {
+            'meta': dict(self.meta, python=platform.python_version(), json_backend=JSON_BACKEND,
+                         argv=sys.argv, created=time.strftime('%Y-%m-%dT%H:%M:%S%z')),
+            'total': {'wall': wall, 'cpu': cpu, 'peak_bytes': peak if self.memory else None},
+            'phases': self.phases,
+            'counters': self.counters,
+        }
+        if self.cprofile is not None:
+            stats = pstats.Stats(self.cprofile, stream=io.StringIO()).sort_stats('cumulative')
+            report['functions'] = [
+                {'function': f"{filename}:{line}({function})", 'calls': calls,
+                 'tottime': tottime, 'cumtime': cumtime}
+                for (filename, line, function), (_, calls, tottime, cumtime, _)
+                in sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+            ]
+        return report
+    
+    def save(self, path: Optional[str] = None):
+        """
+        Stop profiling and write the report as JSON, and the cProfile
+        profile (if any) next to it as a .prof file for pstats or snakeviz
+        
+        Args:
+            path: Report path (defaults to self.path)
+        """
+        if not self.enabled:
+            return
+        path = path or self.path
+        self.stop()
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(os.path.splitext(path)[0] + '.prof')
+
+
+class GraphQLError(Exception):
+    """Raised when a GraphQL response contains errors"""
+    
+    def __init__(self, errors: List[Dict]):
+        """
+        Initialize GraphQLError
+        
+        Args:
+            errors: The 'errors' member of the GraphQL response
+        """
+        super().__init__("; ".join(str(error.get('message', error)) for error in errors))
+        self.errors = errors
+
+
 class NetBoxAPI:
     """Class to interact directly with NetBox API without using pynetbox"""
     
-    def __init__(self, url: str, token: str, verify_ssl: bool = True):
+    def __init__(self, url: str, token: str, verify_ssl: bool = True,
+                 pool_connections: int = 4, pool_maxsize: int = 16,
+                 pool_block: bool = False, keep_alive: bool = True,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 timeout: Optional[float] = 60,
+                 on_request: Optional[Callable[[RequestEvent], None]] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None,
+                 profiler: Optional[Profiler] = None):
         """
         Initialize NetBox API client
         
+        The client owns a requests.Session so TCP/TLS connections are reused
+        across pages and calls. Use it as a context manager, or call close(),
+        to release the pooled connections.
+        
+        With a concurrency controller every request (get, status, writes)
+        waits for a slot under its adaptive limit and reports back how it
+        went, and GETs are retried here, with jittered backoff and
+        Retry-After, instead of inside urllib3 where the controller could
+        not see the failures.
+        
         Args:
             url: NetBox API URL
             token: NetBox API token
             verify_ssl: Whether to verify SSL certificates
+            pool_connections: Number of per-host connection pools to cache
+            pool_maxsize: Maximum number of connections kept per host
+            pool_block: Block when the per-host pool is exhausted instead of
+                opening (and then discarding) extra connections
+            keep_alive: Keep connections open between requests
+            max_retries: Retries for connection errors and 429/502/503/504
+                responses on idempotent requests
+            backoff_factor: Exponential backoff factor between retries
+            timeout: Per-request timeout in seconds (None to wait forever)
+            on_request: Callback receiving a RequestEvent after every request
+            concurrency: Adaptive limit on requests in flight
+            profiler: Records each get() as a phase, and the request, JSON
+                decode and conversion time of every page
         """
         self.url = url.rstrip('/')
         self.token = token
         self.verify_ssl = verify_ssl
+        self.timeout = timeout
+        self.on_request = on_request
+        self.concurrency = concurrency
+        self.profiler = profiler if profiler is not None and profiler.enabled else None
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
         self.headers = {
             'Authorization': f'Token {token}',
             'Content-Type': 'application/json',
-            'Accept': 'application/json'
+            'Accept': 'application/json',
+            'Connection': 'keep-alive' if keep_alive else 'close'
         }
         
-    def get(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+        # With a concurrency controller, _request() does the retrying
+        retry_options = dict(
+            total=max_retries if concurrency is None else 0,
+            backoff_factor=backoff_factor,
+            status_forcelist=OVERLOAD_STATUS,
+            allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        try:
+            # Jitter keeps parallel page retries from arriving in lockstep (urllib3 2.x)
+            retry = Retry(backoff_jitter=backoff_factor, **retry_options)
+        except TypeError:
+            retry = Retry(**retry_options)
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.verify = verify_ssl
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # page_timings and last_repair belong to the calling thread, so
+        # threads sharing a client do not mix up each other's calls
+        self._local = threading.local()
+    
+    @property
+    def page_timings(self) -> List[Dict]:
+        """Per-page timings of this thread's most recent get() or iter_pages() call"""
+        return getattr(self._local, 'page_timings', [])
+    
+    @page_timings.setter
+    def page_timings(self, timings: List[Dict]):
+        self._local.page_timings = timings
+    
+    @property
+    def last_repair(self) -> Optional['PageRepair']:
+        """Outcome of this thread's most recent get(repair=True) call"""
+        return getattr(self._local, 'last_repair', None)
+    
+    @last_repair.setter
+    def last_repair(self, repair: Optional['PageRepair']):
+        self._local.last_repair = repair
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close all pooled connections held by the client"""
+        self.session.close()
+    
+    def _api_url(self, endpoint: str) -> str:
+        """Build the full API URL for an endpoint"""
+        # Check if URL already ends with /api to avoid duplicate
+        if self.url.endswith('/api'):
+            return f"{self.url}/{endpoint}"
+        return f"{self.url}/api/{endpoint}"
+    
+    def _request(self, method: str, url: str, retry: bool, **kwargs) -> Tuple[requests.Response, float]:
+        """
+        Send a request, through the concurrency controller if there is one
+        
+        Args:
+            method: HTTP method
+            url: Full URL
+            retry: Retry overload responses and connection errors (only for
+                idempotent requests; used with a concurrency controller)
+            **kwargs: Passed to requests.Session.request
+            
+        Returns:
+            The response and the time it took in seconds
+        """
+        if self.concurrency is None:
+            started = time.perf_counter()
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            return response, time.perf_counter() - started
+        
+        kind = f"{method} {urlsplit(url).path}"
+        attempt = 0
+        while True:
+            self.concurrency.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.concurrency.release(None, overloaded=True)
+                if not retry or attempt >= self.max_retries:
+                    raise
+                delay = _backoff_delay(self.backoff_factor, attempt)
+                logger.warning("%s %s failed (%s), retrying in %.1fs", method, url, e, delay)
+            else:
+                elapsed = time.perf_counter() - started
+                overloaded = response.status_code in OVERLOAD_STATUS
+                self.concurrency.release(elapsed, overloaded, kind)
+                retry_after = _retry_after(response)
+                if retry_after is not None:
+                    self.concurrency.pause(retry_after)
+                if not overloaded or not retry or attempt >= self.max_retries:
+                    return response, elapsed
+                delay = retry_after if retry_after is not None else _backoff_delay(self.backoff_factor, attempt)
+                logger.warning("%s %s: HTTP %d, retrying in %.1fs", method, url, response.status_code, delay)
+            time.sleep(delay)
+            attempt += 1
+        
+    def _fetch_page(self, url: str, params: Optional[Dict], page_count: Optional[int],
+                    timings: Optional[List[Dict]] = None) -> Tuple[Dict, bytes]:
+        """
+        Fetch and decode a single page, recording its timing
+        
+        Args:
+            url: Full page URL
+            params: Query parameters (None once they are part of the URL)
+            page_count: Page number, used for tracing and timing (None for
+                non-paginated requests)
+            timings: Page timings of the calling get(), appended to
+            
+        Returns:
+            Decoded JSON response and the raw response body
+        """
+        logger.debug("GET %s params=%s (page %s)", url, params, page_count)
+        
+        # Make the request
+        cpu = time.thread_time()
+        response, elapsed = self._request('GET', url, retry=True, params=params)
+        content = response.content
+        if self.profiler is not None:
+            self.profiler.add('request', elapsed, time.thread_time() - cpu, bytes=len(content))
+        
+        logger.debug("GET %s: HTTP %d, %d bytes in %.3fs",
+                     response.url, response.status_code, len(content), elapsed)
+        
+        # Raise exception for bad status codes
+        if not response.ok:
+            _emit(self.on_request, RequestEvent('GET', response.url, response.status_code,
+                                                elapsed, len(content), page=page_count))
+            response.raise_for_status()
+        started, cpu = time.perf_counter(), time.thread_time()
+        data = json_loads(content)
+        if self.profiler is not None:
+            self.profiler.add('decode', time.perf_counter() - started, time.thread_time() - cpu)
+        
+        result_count = None
+        if 'results' in data:
+            result_count = len(data['results'])
+            logger.debug("Page %s: %d items (total %s), next %s",
+                         page_count, result_count, data.get('count'), data.get('next'))
+            if timings is not None:
+                timings.append({
+                    'page': page_count,
+                    'url': response.url,
+                    'elapsed': elapsed,
+                    'items': result_count
+                })
+        
+        _emit(self.on_request, RequestEvent('GET', response.url, response.status_code,
+                                            elapsed, len(content), result_count, page_count))
+        return data, content
+    
+    def _convert(self, data: Dict, content: bytes, output: str) -> List:
+        """Convert the results of a page, timing it when profiling"""
+        if self.profiler is None:
+            return _convert_page(data, content, output)
+        started, cpu = time.perf_counter(), time.thread_time()
+        results = _convert_page(data, content, output)
+        self.profiler.add('convert', time.perf_counter() - started, time.thread_time() - cpu)
+        return results
+    
+    @staticmethod
+    def _plan_pages(next_url: str, count: int) -> List[str]:
+        """
+        Plan the URLs of all remaining pages from the first 'next' link
+        
+        Args:
+            next_url: The 'next' link returned with the first page
+            count: Total number of objects reported by the first page
+            
+        Returns:
+            Page URLs in page order
+        """
+        parts = urlsplit(next_url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        values = dict(query)
+        limit = int(values['limit'])
+        start = int(values.get('offset', limit))
+        
+        urls = []
+        for offset in range(start, count, limit):
+            page_query = [(k, v) for k, v in query if k != 'offset'] + [('offset', str(offset))]
+            urls.append(urlunsplit(parts._replace(query=urlencode(page_query))))
+        return urls
+    
+    @staticmethod
+    def _log_page_timings(page_timings: List[Dict]):
+        """Log a per-page timing summary of one get()"""
+        if not page_timings or not logger.isEnabledFor(logging.INFO):
+            return
+        timings = sorted(t['elapsed'] for t in page_timings)
+        logger.info("Page timings: %d page(s), min %.3fs, avg %.3fs, max %.3fs",
+                    len(timings), timings[0], sum(timings) / len(timings), timings[-1])
+        
+    def _iter_page_data(self, url: str, params: Optional[Dict], page_count: int,
+                        timings: Optional[List[Dict]] = None) -> Iterator[Tuple[Dict, bytes]]:
+        """
+        Follow 'next' links from url, yielding each decoded page
+        
+        Args:
+            url: URL of the first page to fetch
+            params: Query parameters for the first page
+            page_count: Page number of the first page
+            timings: Page timings of the calling get(), appended to
+            
+        Yields:
+            Decoded JSON response and raw body of each page
+        """
+        next_url = url
+        while next_url:
+            data, content = self._fetch_page(next_url, params, page_count, timings)
+            yield data, content
+            next_url = data.get('next')
+            # Params are included in the next URL after the first request
+            params = None
+            page_count += 1
+    
+    def _iter_cursor_data(self, url: str, params: Optional[Dict], page_count: int,
+                          timings: Optional[List[Dict]] = None) -> Iterator[Tuple[Dict, bytes]]:
+        """
+        Page through url by id (keyset pagination), yielding each decoded page
+        
+        Results are ordered by id and every page after the first is requested
+        with id__gt=<last id seen>, so the server never has to skip over an
+        offset and rows cannot shift between pages while paging.
+        
+        Args:
+            url: URL of the endpoint
+            params: Query parameters applied to every page
+            page_count: Page number of the first page
+            timings: Page timings of the calling get(), appended to
+            
+        Yields:
+            Decoded JSON response and raw body of each page
+        """
+        params = dict(params or {})
+        params['ordering'] = 'id'
+        while True:
+            data, content = self._fetch_page(url, params, page_count, timings)
+            yield data, content
+            results = data.get('results')
+            # 'next' is only set when rows remain after this page
+            if not results or not data.get('next'):
+                return
+            params['id__gt'] = results[-1]['id']
+            page_count += 1
+    
+    def _repair(self, url: str, params: Dict, results: List, count: int,
+                output: str, timings: Optional[List[Dict]] = None) -> Tuple[List, PageRepair]:
+        """
+        Drop duplicated rows and re-fetch the id ranges that lost rows
+        
+        Offset windows only hold the same rows twice when NetBox's ordering
+        is deterministic, so the repair works on id ranges instead. Each
+        request asks for a range with ordering=id, which returns the range's
+        count and its first page; that page is a complete view of the ids it
+        spans and replaces the rows held there. The rest of the range is
+        only fetched again when its count differs from the rows held, split
+        at the median held id while few rows are off, so intact ranges cost
+        no further requests and a range that is off throughout costs no more
+        than paging through it. A range that lost one row and gained another
+        looks intact.
+        
+        Args:
+            url: Endpoint URL
+            params: Query parameters of the original pull
+            results: Converted results of the original pull
+            count: Object count reported by the first page
+            output: 'record' or 'dict'
+            timings: Page timings of the calling get(), appended to
+            
+        Returns:
+            Results in their original order, with re-fetched rows at the
+            end, and what the repair did
+        """
+        rows = {}
+        for item in results:
+            rows.setdefault(item['id'], item)
+        repair = PageRepair(count, duplicates=len(results) - len(rows))
+        if len(rows) == count:
+            return list(rows.values()), repair
+        
+        window_params = {key: value for key, value in params.items()
+                         if key not in ('offset', 'ordering', 'id__gt', 'id__gte', 'id__lt', 'id__lte')}
+        window_params['ordering'] = 'id'
+        held = sorted(rows)
+        # Inclusive id bounds, None when open
+        ranges = [(None, None)]
+        while ranges:
+            low, high = ranges.pop()
+            window = dict(window_params)
+            if low is not None:
+                window['id__gte'] = low
+            if high is not None:
+                window['id__lte'] = high
+            data, content = self._fetch_page(url, window, None, timings)
+            repair.requests += 1
+            if low is None and high is None:
+                # NetBox may have changed since the first page
+                repair.count = data['count']
+            page = self._convert(data, content, output)
+            complete = len(page) >= data['count']
+            last = high if complete else page[-1]['id']
+            
+            # Replace the rows held in [low, last] with the page
+            start = 0 if low is None else bisect.bisect_left(held, low)
+            end = len(held) if last is None else bisect.bisect_right(held, last)
+            page_ids = {item['id'] for item in page}
+            for object_id in held[start:end]:
+                if object_id not in page_ids:
+                    del rows[object_id]
+                    repair.removed += 1
+            for item in page:
+                if item['id'] not in rows:
+                    rows[item['id']] = item
+                    repair.missing += 1
+            held[start:end] = sorted(page_ids)
+            if complete:
+                continue
+            
+            # Only the rest of the range is left; skip it if the counts agree
+            start = bisect.bisect_right(held, last)
+            end = len(held) if high is None else bisect.bisect_right(held, high)
+            remaining = data['count'] - len(page)
+            if end - start == remaining:
+                continue
+            # Splitting pays off while fewer rows are off than pages are left;
+            # otherwise paging straight through the range is cheaper
+            pages_left = -(-remaining // len(page))
+            if end - start >= 2 and abs(end - start - remaining) < pages_left:
+                middle = held[(start + end) // 2]
+                ranges += [(last + 1, middle), (middle + 1, high)]
+            else:
+                ranges.append((last + 1, high))
+        
+        repair.reconciled = len(rows) == repair.count
+        return list(rows.values()), repair
+    
+    def iter_pages(self, endpoint: str, params: Optional[Dict] = None,
+                   cursor: bool = False, output: str = 'record', brief: bool = False,
+                   fields: Optional[List[str]] = None,
+                   exclude: Optional[List[str]] = None) -> Iterator[List]:
+        """
+        Yield the results of a paginated endpoint one page at a time
+        
+        Only the current page is held in memory, so large result sets can be
+        grouped or checked while they are still being fetched.
+        
+        Args:
+            endpoint: API endpoint (e.g. 'ipam/ip-addresses/')
+            params: Query parameters
+            cursor: Page by id (id__gt) instead of following offset links
+            output: 'record' for Record objects, 'dict' for plain decoded
+                dictionaries or 'bytes' for the raw body of each page
+            brief: Request NetBox's brief representation of each object
+            fields: Only return these fields (?fields=, NetBox 4.0+)
+            exclude: Leave out these fields (?exclude=, e.g. config_context)
+            
+        Yields:
+            List of results for each page (a single body in 'bytes' mode)
+        """
+        _check_output(output)
+        if cursor:
+            # Pages follow on from the last id
+            fields = _with_id(fields)
+        params = _field_params(params, brief, fields, exclude)
+        timings = self.page_timings = []
+        iter_data = self._iter_cursor_data if cursor else self._iter_page_data
+        for data, content in iter_data(self._api_url(endpoint), params, 1, timings):
+            if 'results' not in data:
+                raise ValueError(f"Endpoint {endpoint} is not paginated")
+            yield self._convert(data, content, output)
+    
+    def iter_results(self, endpoint: str, params: Optional[Dict] = None,
+                     cursor: bool = False, output: str = 'record', brief: bool = False,
+                     fields: Optional[List[str]] = None,
+                     exclude: Optional[List[str]] = None) -> Iterator:
+        """
+        Yield the objects of a paginated endpoint as each page arrives
+        
+        Args:
+            endpoint: API endpoint (e.g. 'ipam/ip-addresses/')
+            params: Query parameters
+            cursor: Page by id (id__gt) instead of following offset links
+            output: 'record' for Record objects or 'dict' for plain decoded
+                dictionaries
+            brief: Request NetBox's brief representation of each object
+            fields: Only return these fields (?fields=, NetBox 4.0+)
+            exclude: Leave out these fields (?exclude=, e.g. config_context)
+            
+        Yields:
+            Record object (or dictionary) for each result
+        """
+        if output == 'bytes':
+            raise ValueError("iter_results() yields objects; use iter_pages() for raw page bytes")
+        for page in self.iter_pages(endpoint, params, cursor=cursor, output=output,
+                                    brief=brief, fields=fields, exclude=exclude):
+            yield from page
+        
+    def get(self, endpoint: str, params: Optional[Dict] = None,
+            parallel: bool = False, max_workers: int = 8,
+            cursor: bool = False, output: str = 'record', brief: bool = False,
+            fields: Optional[List[str]] = None,
+            exclude: Optional[List[str]] = None, repair: bool = False) -> Any:
         """
         Make a request to the NetBox API
         
+        By default pages are fetched one at a time by following 'next' links.
+        With parallel=True the first page is fetched, its 'count' is used to
+        plan every remaining offset/limit window, and those pages are fetched
+        on a thread pool and merged back in page order. With cursor=True
+        results are ordered by id and paged with id__gt=<last id>, which keeps
+        per-page server work flat and the result set stable on deep pulls.
+        
+        With repair=True a pull that returned duplicated rows, or not as many
+        rows as its 'count', is reconciled instead of returned as is: the
+        duplicates are dropped and only the id ranges that lost rows are
+        fetched again, ordered by id (see _repair()). The outcome, including
+        the extra requests it took, is kept in self.last_repair.
+        
+        Per-page timings of the calling thread's last call are available in
+        self.page_timings.
+        
         Args:
             endpoint: API endpoint (e.g. 'ipam/ip-addresses/')
             params: Query parameters
+            parallel: Fetch the remaining pages concurrently
+            max_workers: Maximum number of concurrent page requests
+            cursor: Page by id (id__gt) instead of following offset links
+            output: 'record' for Record objects, 'dict' for plain decoded
+                dictionaries or 'bytes' for the raw body of each page
+            brief: Request NetBox's brief representation of each object
+            fields: Only return these fields (?fields=, NetBox 4.0+)
+            exclude: Leave out these fields (?exclude=, e.g. config_context)
+            repair: Reconcile duplicated or missing rows with the count
             
         Returns:
-            API response as dictionary or list of DotDict objects
+            API response as a Record or list of Record objects; plain
+            dictionaries in 'dict' mode; raw page bodies in 'bytes' mode
         """
-        # Check if URL already ends with /api to avoid duplicate
-        if self.url.endswith('/api'):
-            url = f"{self.url}/{endpoint}"
-        else:
-            url = f"{self.url}/api/{endpoint}"
+        args = (endpoint, params, parallel, max_workers, cursor, output, brief, fields, exclude, repair)
+        if self.profiler is None:
+            return self._get(*args)
+        with self.profiler.phase(f"GET {endpoint.split('?')[0]}"):
+            return self._get(*args)
+    
+    def _get(self, endpoint: str, params: Optional[Dict], parallel: bool, max_workers: int,
+             cursor: bool, output: str, brief: bool, fields: Optional[List[str]],
+             exclude: Optional[List[str]], repair: bool) -> Any:
+        """get() without profiling; see get() for the arguments"""
+        _check_output(output)
+        if parallel and cursor:
+            raise ValueError("parallel and cursor pagination cannot be combined")
+        if repair and output == 'bytes':
+            raise ValueError("repair needs decoded results; use output='record' or 'dict'")
+        if repair or cursor:
+            # Rows are reconciled, or paged, by id
+            fields = _with_id(fields)
+        
+        url = self._api_url(endpoint)
             
         # Initialize results and set up pagination parameters
-        if params is None:
-            params = {}
+        params = _field_params(params, brief, fields, exclude)
         
-        results = []
-        next_url = url
-        page_count = 1
+        timings = self.page_timings = []
         
-        # Follow pagination by getting all pages
-        while next_url:
-            # Print request details before making the request
-            print(f"\n--- NetBox API Request (Page {page_count}) ---")
-            print(f"URL: {next_url}")
-            print(f"Method: GET")
-            print(f"Headers: {json.dumps({k: v if k != 'Authorization' else '[REDACTED]' for k, v in self.headers.items()}, indent=2)}")
-            print(f"Params: {json.dumps(params, indent=2)}")
-            
-            # Make the request
-            response = requests.get(next_url, headers=self.headers, params=params, verify=self.verify_ssl)
-            
-            # Print response details
-            print(f"\n--- NetBox API Response (Page {page_count}) ---")
-            print(f"Status Code: {response.status_code}")
-            print(f"Response Time: {response.elapsed.total_seconds():.3f} seconds")
-            print(f"Response Size: {len(response.content)} bytes")
-            
-            # Raise exception for bad status codes
-            response.raise_for_status()
-            data = response.json()
-            
-            # Print pagination info if available
-            if 'results' in data:
-                result_count = len(data['results'])
-                total_count = data.get('count', 'unknown')
-                print(f"Results: {result_count} items (Page {page_count}, Total: {total_count})")
-                if data.get('next'):
-                    print(f"Next Page: {data['next']}")
-            
-            # Add results from this page
-            if 'results' in data:
-                # Convert each result to DotDict for attribute access
-                results.extend([DotDict(item) for item in data['results']])
-                next_url = data.get('next')
-                # Clear params after first request as they're included in the next URL
-                params = {}
+        iter_data = self._iter_cursor_data if cursor else self._iter_page_data
+        pages = iter_data(url, params, 1, timings)
+        data, content = next(pages)
+        if 'results' not in data:
+            # If no pagination, just return the data as Record
+            return _convert_single(data, content, output)
+        
+        # Convert each result to Record for attribute access
+        results = self._convert(data, content, output)
+        count = data['count']
+        next_url = data.get('next')
+        page_count = 2
+        
+        if parallel and next_url:
+            page_urls = self._plan_pages(next_url, data['count'])
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Params are already part of the planned URLs
+                futures = [
+                    executor.submit(self._fetch_page, page_url, None, number, timings)
+                    for number, page_url in enumerate(page_urls, start=page_count)
+                ]
+                # Merge in page order, not completion order
+                for future in futures:
+                    results.extend(self._convert(*future.result(), output))
+            page_count += len(page_urls)
+            timings.sort(key=lambda timing: timing['page'])
+        else:
+            # Follow pagination by getting all remaining pages
+            for data, content in pages:
+                results.extend(self._convert(data, content, output))
                 page_count += 1
-            else:
-                # If no pagination, just return the data as DotDict
-                print(f"Single response (non-paginated)")
-                return DotDict(data)
                 
-        # Return compiled results as list of DotDict objects
-        print(f"\nCompleted API requests: {page_count-1} page(s), {len(results)} total items retrieved")
+        if repair:
+            results, self.last_repair = self._repair(url, params, results, count, output, timings)
+            repaired = self.last_repair
+            if repaired.duplicates or repaired.requests:
+                logger.info("Repaired pagination: %d duplicate(s) dropped, %d missing and %d removed "
+                            "row(s) in %d extra request(s)", repaired.duplicates, repaired.missing,
+                            repaired.removed, repaired.requests)
+            if not repaired.reconciled:
+                logger.warning("Pagination repair left %d row(s), NetBox reports %d",
+                               len(results), repaired.count)
+        
+        # Return compiled results as list of Record objects
+        logger.info("Completed API requests: %d page(s), %d total items retrieved",
+                    page_count - 1, len(results))
+        self._log_page_timings(timings)
         return results
         
     def status(self) -> Dict:
@@ -129,27 +1243,580 @@ class NetBoxAPI:
         Get NetBox status information
         
         Returns:
-            Status information as a DotDict
+            Status information as a Record
+        """
+        data, content = self._fetch_page(self._api_url("status/"), None, None)
+        return Record(data)
+    
+    def _graphql_url(self) -> str:
+        """Build the GraphQL URL, which sits next to (not under) /api/"""
+        base = self.url[:-len('/api')] if self.url.endswith('/api') else self.url
+        return f"{base}/graphql/"
+    
+    def graphql(self, query: str, variables: Optional[Dict] = None,
+                output: str = 'record') -> Any:
+        """
+        Run a GraphQL query
+        
+        Args:
+            query: GraphQL query document
+            variables: Values for the variables declared by the query
+            output: 'record' for Record objects or 'dict' for plain decoded
+                dictionaries
+            
+        Returns:
+            The 'data' member of the response
+            
+        Raises:
+            GraphQLError: The response reported errors, or was empty or not
+                a GraphQL response object
+        """
+        if output not in ('record', 'dict'):
+            raise ValueError(f"output must be 'record' or 'dict', not {output!r}")
+        response = self._send_url('POST', self._graphql_url(),
+                                  {'query': query, 'variables': variables or {}})
+        if not isinstance(response, dict) or ('data' not in response and not response.get('errors')):
+            received = "an empty response" if response is None else f"{type(response).__name__} {response!r:.200}"
+            raise GraphQLError([{'message': f"Expected a GraphQL response object, got {received}"}])
+        if response.get('errors'):
+            raise GraphQLError(response['errors'])
+        return _wrap(response['data']) if output == 'record' else response['data']
+    
+    def get_device_interfaces(self, device_id: int, with_macs: bool = True,
+                              page_size: int = 1000, output: str = 'record') -> List:
         """
+        Fetch a device's interfaces with their IP and MAC addresses over GraphQL
+        
+        One query returns each interface with its ip_addresses and
+        mac_addresses nested in it, so a snapshot takes one request per page
+        instead of one paginated pull per endpoint, and no client-side join.
+        Interfaces have the same shape as those from dcim/interfaces/ with
+        an additional ip_addresses list.
+        
+        Args:
+            device_id: Device ID
+            with_macs: Include mac_addresses (NetBox 4.2+)
+            page_size: Interfaces per request (NetBox may return fewer)
+            output: 'record' for Record objects or 'dict' for plain decoded
+                dictionaries
+            
+        Returns:
+            Interfaces, each with nested ip_addresses (and mac_addresses)
+            
+        Raises:
+            GraphQLError: The query was rejected by the server
+        """
+        selection = "\n    mac_addresses { id mac_address }" if with_macs else ""
+        query = GRAPHQL_INTERFACES_QUERY % (int(device_id), selection)
+        
+        results = []
+        offset = 0
+        page_count = 0
+        full_page = 0
+        while True:
+            page = self.graphql(query, {'offset': offset, 'limit': page_size},
+                                output='dict')['interface_list']
+            page_count += 1
+            results.extend(page if output == 'dict' else [Record(item) for item in page])
+            # There is no count or next link, and MAX_PAGE_SIZE may cap the
+            # limit below page_size: only an empty page, or one shorter than
+            # an earlier page, is known to be the last
+            if not page or len(page) < full_page:
+                break
+            full_page = len(page)
+            offset += len(page)
+        
+        logger.info("Completed GraphQL requests: %d page(s), %d interfaces retrieved",
+                    page_count, len(results))
+        return results
+    
+    def _send(self, method: str, endpoint: str, payload: Any) -> Any:
+        """
+        Send a write request with a JSON body
+        
+        Args:
+            method: HTTP method ('POST', 'PATCH' or 'DELETE')
+            endpoint: API endpoint (e.g. 'dcim/interfaces/')
+            payload: JSON-serialisable request body
+            
+        Returns:
+            Decoded JSON response, or None for an empty response
+        """
+        return self._send_url(method, self._api_url(endpoint), payload)
+    
+    def _send_url(self, method: str, url: str, payload: Any) -> Any:
+        """
+        Send a request with a JSON body to a full URL
+        
+        Args:
+            method: HTTP method
+            url: Full URL
+            payload: JSON-serialisable request body
+            
+        Returns:
+            Decoded JSON response, or None for an empty response
+        """
+        items = len(payload) if isinstance(payload, list) else 1
+        logger.debug("%s %s (%d objects)", method, url, items)
+        
+        response, elapsed = self._request(method, url, retry=False, json=payload)
+        content = response.content
+        
+        logger.debug("%s %s: HTTP %d, %d bytes in %.3fs",
+                     method, url, response.status_code, len(content), elapsed)
+        _emit(self.on_request, RequestEvent(method, url, response.status_code,
+                                            elapsed, len(content), items))
+        
+        response.raise_for_status()
+        return json_loads(content) if content else None
+    
+    def post(self, endpoint: str, data: Any) -> Any:
+        """
+        Create one object, or several when data is a list (bulk create)
+        
+        Args:
+            endpoint: API endpoint (e.g. 'dcim/interfaces/')
+            data: Object or list of objects to create
+            
+        Returns:
+            Created object(s) as Record objects
+        """
+        return _wrap(self._send('POST', endpoint, data))
+    
+    def patch(self, endpoint: str, data: Any) -> Any:
+        """
+        Update objects in bulk, or one object when endpoint includes its ID
+        
+        Args:
+            endpoint: API endpoint (e.g. 'dcim/interfaces/')
+            data: Object or list of objects (each with an 'id') to update
+            
+        Returns:
+            Updated object(s) as Record objects
+        """
+        return _wrap(self._send('PATCH', endpoint, data))
+    
+    def delete(self, endpoint: str, ids: List[int]):
+        """
+        Delete objects in bulk
+        
+        Args:
+            endpoint: API endpoint (e.g. 'dcim/interfaces/')
+            ids: IDs of the objects to delete
+        """
+        self._send('DELETE', endpoint, [{'id': object_id} for object_id in ids])
+
+
+class AsyncNetBoxAPI:
+    """Asyncio counterpart of NetBoxAPI backed by httpx.AsyncClient"""
+    
+    def __init__(self, url: str, token: str, verify_ssl: bool = True,
+                 max_in_flight: int = 8, max_connections: int = 16,
+                 max_retries: int = 3, timeout: Optional[float] = 60,
+                 on_request: Optional[Callable[[RequestEvent], None]] = None):
+        """
+        Initialize async NetBox API client
+        
+        All requests made through one client share a connection pool and a
+        semaphore, so several get() calls can be gathered in the same event
+        loop without exceeding max_in_flight concurrent requests.
+        
+        Args:
+            url: NetBox API URL
+            token: NetBox API token
+            verify_ssl: Whether to verify SSL certificates
+            max_in_flight: Maximum number of concurrent requests
+            max_connections: Maximum number of pooled connections
+            max_retries: Retries for failed connection attempts
+            timeout: Per-request timeout in seconds (None to wait forever)
+            on_request: Callback receiving a RequestEvent after every request
+        """
+        if httpx is None:
+            raise ImportError("AsyncNetBoxAPI requires httpx (pip install httpx)")
+        
+        self.url = url.rstrip('/')
+        self.token = token
+        self.verify_ssl = verify_ssl
+        self.on_request = on_request
+        self.headers = {
+            'Authorization': f'Token {token}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            verify=verify_ssl,
+            timeout=timeout,
+            # httpx ignores the client's limits when given a transport
+            transport=httpx.AsyncHTTPTransport(
+                retries=max_retries,
+                verify=verify_ssl,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections
+                )
+            )
+        )
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+    
+    async def close(self):
+        """Close all pooled connections held by the client"""
+        await self.client.aclose()
+    
+    def _api_url(self, endpoint: str) -> str:
+        """Build the full API URL for an endpoint"""
         if self.url.endswith('/api'):
-            url = f"{self.url}/status/"
+            return f"{self.url}/{endpoint}"
+        return f"{self.url}/api/{endpoint}"
+    
+    async def _fetch_page(self, url: str, params: Optional[Dict] = None,
+                          page_count: Optional[int] = None) -> Tuple[Dict, bytes]:
+        """
+        Fetch and decode a single page while holding the semaphore
+        
+        Args:
+            url: Full page URL
+            params: Query parameters, merged with any already in the URL
+            page_count: Page number, used for tracing (None for non-paginated
+                requests)
+            
+        Returns:
+            Decoded JSON response and the raw response body
+        """
+        if params:
+            parts = urlsplit(url)
+            query = parse_qsl(parts.query, keep_blank_values=True) + list(params.items())
+            url = urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
+        
+        logger.debug("GET %s (page %s)", url, page_count)
+        async with self.semaphore:
+            started = time.perf_counter()
+            response = await self.client.get(url)
+            elapsed = time.perf_counter() - started
+        content = response.content
+        logger.debug("GET %s: HTTP %d, %d bytes in %.3fs",
+                     url, response.status_code, len(content), elapsed)
+        
+        if response.is_error:
+            _emit(self.on_request, RequestEvent('GET', url, response.status_code,
+                                                elapsed, len(content), page=page_count))
+            response.raise_for_status()
+        data = json_loads(content)
+        
+        result_count = len(data['results']) if 'results' in data else None
+        _emit(self.on_request, RequestEvent('GET', url, response.status_code,
+                                            elapsed, len(content), result_count, page_count))
+        return data, content
+    
+    async def get(self, endpoint: str, params: Optional[Dict] = None,
+                  parallel: bool = False, output: str = 'record', brief: bool = False,
+                  fields: Optional[List[str]] = None,
+                  exclude: Optional[List[str]] = None) -> Any:
+        """
+        Make a request to the NetBox API
+        
+        Args:
+            endpoint: API endpoint (e.g. 'ipam/ip-addresses/')
+            params: Query parameters
+            parallel: Fetch the remaining pages concurrently after planning
+                them from the first page's 'count'
+            output: 'record' for Record objects, 'dict' for plain decoded
+                dictionaries or 'bytes' for the raw body of each page
+            brief: Request NetBox's brief representation of each object
+            fields: Only return these fields (?fields=, NetBox 4.0+)
+            exclude: Leave out these fields (?exclude=, e.g. config_context)
+            
+        Returns:
+            API response as a Record or list of Record objects; plain
+            dictionaries in 'dict' mode; raw page bodies in 'bytes' mode
+        """
+        _check_output(output)
+        params = _field_params(params, brief, fields, exclude)
+        data, content = await self._fetch_page(self._api_url(endpoint), params, 1)
+        if 'results' not in data:
+            return _convert_single(data, content, output)
+        
+        results = _convert_page(data, content, output)
+        next_url = data.get('next')
+        page_count = 2
+        
+        if parallel and next_url:
+            page_urls = NetBoxAPI._plan_pages(next_url, data['count'])
+            # gather() preserves page order
+            pages = await asyncio.gather(*(
+                self._fetch_page(page_url, None, number)
+                for number, page_url in enumerate(page_urls, start=page_count)
+            ))
+            for data, content in pages:
+                results.extend(_convert_page(data, content, output))
+            page_count += len(page_urls)
         else:
-            url = f"{self.url}/api/status/"
+            while next_url:
+                data, content = await self._fetch_page(next_url, None, page_count)
+                results.extend(_convert_page(data, content, output))
+                next_url = data.get('next')
+                page_count += 1
+        
+        logger.info("Completed API requests: %d page(s), %d total items retrieved",
+                    page_count - 1, len(results))
+        return results
+    
+    async def iter_pages(self, endpoint: str, params: Optional[Dict] = None,
+                         output: str = 'record', brief: bool = False,
+                         fields: Optional[List[str]] = None,
+                         exclude: Optional[List[str]] = None) -> AsyncIterator[List]:
+        """
+        Yield the results of a paginated endpoint one page at a time
         
-        # Print request details
-        print("\n--- NetBox API Status Request ---")
-        print(f"URL: {url}")
-        print(f"Method: GET")
-        print(f"Headers: {json.dumps({k: v if k != 'Authorization' else '[REDACTED]' for k, v in self.headers.items()}, indent=2)}")
+        Args:
+            endpoint: API endpoint (e.g. 'ipam/ip-addresses/')
+            params: Query parameters
+            output: 'record' for Record objects, 'dict' for plain decoded
+                dictionaries or 'bytes' for the raw body of each page
+            brief: Request NetBox's brief representation of each object
+            fields: Only return these fields (?fields=, NetBox 4.0+)
+            exclude: Leave out these fields (?exclude=, e.g. config_context)
             
-        # Make the request
-        response = requests.get(url, headers=self.headers, verify=self.verify_ssl)
+        Yields:
+            List of results for each page (a single body in 'bytes' mode)
+        """
+        _check_output(output)
+        params = _field_params(params, brief, fields, exclude)
+        next_url = self._api_url(endpoint)
+        page_count = 1
+        while next_url:
+            data, content = await self._fetch_page(next_url, params, page_count)
+            if 'results' not in data:
+                raise ValueError(f"Endpoint {endpoint} is not paginated")
+            yield _convert_page(data, content, output)
+            next_url = data.get('next')
+            params = None
+            page_count += 1
+    
+    async def iter_results(self, endpoint: str, params: Optional[Dict] = None,
+                           output: str = 'record', brief: bool = False,
+                           fields: Optional[List[str]] = None,
+                           exclude: Optional[List[str]] = None) -> AsyncIterator:
+        """
+        Yield the objects of a paginated endpoint as each page arrives
         
-        # Print response details
-        print("\n--- NetBox API Status Response ---")
-        print(f"Status Code: {response.status_code}")
-        print(f"Response Time: {response.elapsed.total_seconds():.3f} seconds")
-        print(f"Response Size: {len(response.content)} bytes")
+        Args:
+            endpoint: API endpoint (e.g. 'ipam/ip-addresses/')
+            params: Query parameters
+            output: 'record' for Record objects or 'dict' for plain decoded
+                dictionaries
+            brief: Request NetBox's brief representation of each object
+            fields: Only return these fields (?fields=, NetBox 4.0+)
+            exclude: Leave out these fields (?exclude=, e.g. config_context)
+            
+        Yields:
+            Record object (or dictionary) for each result
+        """
+        if output == 'bytes':
+            raise ValueError("iter_results() yields objects; use iter_pages() for raw page bytes")
+        async for page in self.iter_pages(endpoint, params, output=output,
+                                          brief=brief, fields=fields, exclude=exclude):
+            for item in page:
+                yield item
+    
+    async def status(self) -> Dict:
+        """
+        Get NetBox status information
         
-        response.raise_for_status()
-        return DotDict(response.json())
\ No newline at end of file
+        Returns:
+            Status information as a Record
+        """
+        data, content = await self._fetch_page(self._api_url("status/"))
+        return Record(data)
+
+
+class BulkWriteError(Exception):
+    """Raised when one or more chunks of a bulk write could not be written"""
+    
+    def __init__(self, message: str, completed: List, errors: List[Exception]):
+        """
+        Initialize BulkWriteError
+        
+        Args:
+            message: Error message
+            completed: Objects returned by the chunks that were written
+            errors: Exception raised by each chunk that failed
+        """
+        super().__init__(message)
+        self.completed = completed
+        self.errors = errors
+
+
+class BulkWriter:
+    """Chunked, concurrent bulk create/update/delete on top of NetBoxAPI"""
+    
+    # Responses that indicate an overloaded or restarting server
+    TRANSIENT_STATUS = OVERLOAD_STATUS
+    # Responses after which a POST was certainly not committed. A timeout,
+    # 502 or 504 may come after NetBox created the chunk, and sending it
+    # again would create every object twice.
+    UNCOMMITTED_STATUS = (429, 503)
+    
+    def __init__(self, api: NetBoxAPI, chunk_size: int = 500, max_workers: int = 4,
+                 max_retries: int = 3, backoff_factor: float = 1.0):
+        """
+        Initialize BulkWriter
+        
+        Args:
+            api: NetBoxAPI client used to send the requests
+            chunk_size: Number of objects sent per request
+            max_workers: Maximum number of chunks in flight at once
+            max_retries: Retries per chunk for transient failures
+            backoff_factor: Base delay in seconds between retries, doubled on
+                each attempt and jittered
+        """
+        self.api = api
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        
+        # Statistics of the most recent write
+        self.last_stats = {}
+    
+    def _is_transient(self, error: Exception, method: str = 'PATCH') -> bool:
+        """
+        Whether a failed chunk is worth retrying
+        
+        PATCH sets the same fields again and DELETE of a deleted object
+        fails with 404, so those are retried on any transient failure. POST
+        is not idempotent and is only retried when the chunk cannot have
+        been committed: the connection was never made, or NetBox answered
+        429 or 503 without handling the request.
+        """
+        response = getattr(error, 'response', None)
+        if method == 'POST':
+            if response is not None:
+                return response.status_code in self.UNCOMMITTED_STATUS
+            return _not_sent(error)
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        return response is not None and response.status_code in self.TRANSIENT_STATUS
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Delay before retrying, honouring Retry-After when the server sent one"""
+        retry_after = _retry_after(getattr(error, 'response', None))
+        if retry_after is not None:
+            return retry_after
+        return _backoff_delay(self.backoff_factor, attempt)
+    
+    def _write_chunk(self, method: str, endpoint: str, chunk: List) -> Tuple[List, int]:
+        """
+        Send one chunk, retrying transient failures
+        
+        Returns:
+            Written objects and the number of retries that were needed
+        """
+        attempt = 0
+        while True:
+            try:
+                result = self.api._send(method, endpoint, chunk)
+                return _wrap(result) or [], attempt
+            except requests.RequestException as e:
+                if attempt >= self.max_retries or not self._is_transient(e, method):
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning("%s %s chunk of %d failed (%s), retrying in %.1fs",
+                               method, endpoint, len(chunk), e, delay)
+                time.sleep(delay)
+                attempt += 1
+    
+    def _write(self, method: str, endpoint: str, objects: List) -> List:
+        """
+        Split objects into chunks and write them concurrently
+        
+        Returns:
+            Written objects, in the order of the input
+        """
+        chunks = [objects[i:i + self.chunk_size] for i in range(0, len(objects), self.chunk_size)]
+        results = []
+        errors = []
+        written_count = 0
+        retries = 0
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._write_chunk, method, endpoint, chunk) for chunk in chunks]
+            # Collect in chunk order so results line up with the input
+            for chunk, future in zip(chunks, futures):
+                try:
+                    written, attempts = future.result()
+                except requests.RequestException as e:
+                    errors.append(e)
+                    continue
+                results.extend(written)
+                written_count += len(chunk)
+                retries += attempts
+        elapsed = time.perf_counter() - started
+        
+        self.last_stats = {
+            'method': method,
+            'endpoint': endpoint,
+            'objects': written_count,
+            'chunks': len(chunks),
+            'failed_chunks': len(errors),
+            'retries': retries,
+            'elapsed': elapsed,
+            'rate': written_count / elapsed if elapsed else 0.0
+        }
+        logger.info("%s %s: %d objects in %d chunk(s), %.1fs (%.0f objects/s, %d retries)",
+                    method, endpoint, written_count, len(chunks), elapsed,
+                    self.last_stats['rate'], retries)
+        
+        if errors:
+            raise BulkWriteError(
+                f"{len(errors)} of {len(chunks)} chunk(s) failed writing to {endpoint}: {errors[0]}",
+                results, errors
+            )
+        return results
+    
+    def create(self, endpoint: str, objects: List[Dict]) -> List[Record]:
+        """
+        Create objects in chunks
+        
+        Args:
+            endpoint: API endpoint (e.g. 'dcim/interfaces/')
+            objects: Objects to create
+            
+        Returns:
+            Created objects as Record objects, in the order of the input
+        """
+        return self._write('POST', endpoint, objects)
+    
+    def update(self, endpoint: str, objects: List[Dict]) -> List[Record]:
+        """
+        Update objects in chunks
+        
+        Args:
+            endpoint: API endpoint (e.g. 'dcim/interfaces/')
+            objects: Objects to update, each with an 'id'
+            
+        Returns:
+            Updated objects as Record objects, in the order of the input
+        """
+        return self._write('PATCH', endpoint, objects)
+    
+    def delete(self, endpoint: str, ids: List[int]) -> int:
+        """
+        Delete objects in chunks
+        
+        Args:
+            endpoint: API endpoint (e.g. 'dcim/interfaces/')
+            ids: IDs of the objects to delete
+            
+        Returns:
+            Number of objects deleted
+        """
+        self._write('DELETE', endpoint, [{'id': object_id} for object_id in ids])
+        return self.last_stats['objects']
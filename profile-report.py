@@ -0,0 +1,62 @@
+#!venv/bin/python
+
+"""Show and compare profile reports written with NETBOX_PROFILE
+
+Prints the phases and per-page counters of one or more JSON reports from
+netbox.Profiler side by side, e.g. to compare NetBox versions or a client
+change:
+
+    ./profile-report.py test_profile_v4.1.5.json test_profile_v4.2.0.json
+"""
+
+import argparse
+import json
+from typing import Dict, List
+
+
+def _rows(report: Dict) -> Dict[str, Dict]:
+    """Phases, then counters (marked with '~'), then the run total"""
+    rows = dict(report['phases'])
+    rows.update({f"~ {name}": stats for name, stats in report['counters'].items()})
+    rows['total'] = report['total']
+    return rows
+
+
+def print_reports(paths: List[str]):
+    reports = []
+    for path in paths:
+        with open(path) as f:
+            reports.append(json.load(f))
+
+    names = []
+    for report in reports:
+        names += [name for name in _rows(report) if name not in names and name != 'total']
+    names.append('total')
+
+    for path, report in zip(paths, reports):
+        meta = report['meta']
+        print(f"{path}: NetBox {meta.get('netbox_version', '?')}, client {meta.get('client', meta.get('clients', '?'))}, "
+              f"created {meta.get('created', '?')}")
+    print()
+    header = f"{'phase':<32}"
+    for index in range(len(paths)):
+        header += f" {f'wall #{index + 1}':>10} {f'cpu #{index + 1}':>10} {f'peak #{index + 1}':>10}"
+    print(header)
+    for name in names:
+        line = f"{name:<32}"
+        for report in reports:
+            stats = _rows(report).get(name)
+            if stats is None:
+                line += f" {'-':>10} {'-':>10} {'-':>10}"
+                continue
+            cpu = f"{stats['cpu']:.3f}s" if stats.get('cpu') is not None else "-"
+            peak = f"{stats['peak_bytes'] / 1e6:.1f} MB" if stats.get('peak_bytes') is not None else "-"
+            line += f" {stats['wall']:>9.3f}s {cpu:>10} {peak:>10}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show and compare NETBOX_PROFILE reports")
+    parser.add_argument("paths", nargs="+", help="JSON reports to show side by side")
+    args = parser.parse_args()
+    print_reports(args.paths)
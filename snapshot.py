@@ -0,0 +1,292 @@
+#!venv/bin/python
+
+"""Columnar on-disk snapshots of the interface, IP and MAC address tables
+
+A snapshot is a directory holding one .npy file per audit.py column and a
+meta.json describing it. Integer columns are loaded with numpy's mmap_mode,
+and string columns (interface names, addresses) are stored as one UTF-8
+byte buffer plus offsets and only decoded on access, so loading a snapshot
+costs milliseconds regardless of its size. Snapshots can then be diffed
+across runs or NetBox versions without touching the API.
+
+    NETBOX_SNAPSHOT=snapshot_v4.1.5 ./test-ipam.py
+    ./snapshot.py info snapshot_v4.1.5
+    ./snapshot.py diff snapshot_v4.1.5 snapshot_v4.2.0
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from audit import AddressTable, InterfaceTable, assignment_mismatches
+
+# Bumped when the layout of the snapshot directory changes
+SNAPSHOT_FORMAT = 1
+
+# Array and string columns stored for each table type
+TABLE_COLUMNS = {
+    'interfaces': (InterfaceTable, ('ids', 'name_codes', 'mac_owner', 'mac_ids', 'mac_value_codes'),
+                   ('names', 'mac_values')),
+    'ip_addresses': (AddressTable, ('ids', 'object_ids', 'value_codes'), ('values',)),
+    'mac_addresses': (AddressTable, ('ids', 'object_ids', 'value_codes'), ('values',)),
+}
+
+
+class StringColumn:
+    """Read-only list of strings backed by a UTF-8 buffer and offsets
+
+    Strings are decoded one at a time when indexed, so a memory-mapped
+    column of a million interface names is not materialised on load.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        """
+        Initialize StringColumn
+
+        Args:
+            data: Concatenated UTF-8 bytes of every string (uint8)
+            offsets: Start of each string in data, followed by the end of
+                the last one (int64, one longer than the column)
+        """
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def encode(cls, values: Iterable[str]) -> 'StringColumn':
+        """Build a column from Python strings"""
+        encoded = [value.encode() for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("StringColumn index out of range")
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.data[start:end].tobytes().decode()
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class Snapshot:
+    """Interface, IP address and MAC address tables of one audit run"""
+
+    def __init__(self, interfaces: InterfaceTable, ip_addresses: AddressTable,
+                 mac_addresses: Optional[AddressTable] = None, meta: Optional[Dict] = None):
+        """
+        Initialize Snapshot
+
+        Args:
+            interfaces: Interface table
+            ip_addresses: IP address table
+            mac_addresses: MAC address table (NetBox 4.2+)
+            meta: Free-form description, e.g. NetBox version and device ID
+        """
+        self.interfaces = interfaces
+        self.ip_addresses = ip_addresses
+        self.mac_addresses = mac_addresses
+        self.meta = dict(meta or {})
+
+    def _tables(self) -> Iterator[Tuple[str, object]]:
+        for name in TABLE_COLUMNS:
+            table = getattr(self, name)
+            if table is not None:
+                yield name, table
+
+    def save(self, path: str):
+        """
+        Write the snapshot to a directory, replacing an existing snapshot
+
+        meta.json is written last, so a directory without one is an
+        incomplete snapshot.
+
+        Args:
+            path: Snapshot directory (created if missing)
+        """
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        tables = {}
+        for name, table in self._tables():
+            _, arrays, strings = TABLE_COLUMNS[name]
+            for column in arrays:
+                np.save(os.path.join(path, f"{name}.{column}.npy"), getattr(table, column))
+            for column in strings:
+                values = getattr(table, column)
+                if not isinstance(values, StringColumn):
+                    values = StringColumn.encode(values)
+                np.save(os.path.join(path, f"{name}.{column}.data.npy"), values.data)
+                np.save(os.path.join(path, f"{name}.{column}.offsets.npy"), values.offsets)
+            tables[name] = len(table)
+
+        meta = dict(self.meta, format=SNAPSHOT_FORMAT, tables=tables)
+        meta.setdefault('created', time.strftime('%Y-%m-%dT%H:%M:%S%z'))
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'Snapshot':
+        """
+        Load a snapshot written by save()
+
+        Args:
+            path: Snapshot directory
+            mmap: Memory-map the columns instead of reading them into memory
+
+        Returns:
+            Snapshot whose tables are backed by the files in path
+
+        Raises:
+            ValueError: The directory is not a complete snapshot of a
+                supported format
+        """
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            raise ValueError(f"{path} is not a complete snapshot (no meta.json)")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} has snapshot format {meta.get('format')}, expected {SNAPSHOT_FORMAT}")
+
+        mmap_mode = 'r' if mmap else None
+        tables = {}
+        for name in meta['tables']:
+            table_type, arrays, strings = TABLE_COLUMNS[name]
+            columns = {column: np.load(os.path.join(path, f"{name}.{column}.npy"), mmap_mode=mmap_mode)
+                       for column in arrays}
+            for column in strings:
+                columns[column] = StringColumn(
+                    np.load(os.path.join(path, f"{name}.{column}.data.npy"), mmap_mode=mmap_mode),
+                    np.load(os.path.join(path, f"{name}.{column}.offsets.npy"), mmap_mode=mmap_mode)
+                )
+            tables[name] = table_type(**columns)
+
+        meta.pop('format')
+        meta.pop('tables')
+        return cls(tables['interfaces'], tables['ip_addresses'], tables.get('mac_addresses'), meta)
+
+
+def _value_strings(table: AddressTable, rows: np.ndarray) -> np.ndarray:
+    """Address strings of the given rows as an object array"""
+    values = np.array(list(table.values) + [None], dtype=object)
+    return values[table.value_codes[rows]]
+
+
+def diff_tables(old: AddressTable, new: AddressTable) -> Dict[str, np.ndarray]:
+    """
+    Compare two IP or MAC address tables
+
+    Args:
+        old: Table from the earlier snapshot
+        new: Table from the later snapshot
+
+    Returns:
+        Dictionary with 'added' and 'removed' IDs, 'changed' IDs whose
+        address differs, and 'moved_from'/'moved_to' (interface IDs, object
+        IDs) pairs of assignments only in old and only in new
+    """
+    common, old_rows, new_rows = np.intersect1d(old.ids, new.ids, return_indices=True)
+    changed = _value_strings(old, old_rows) != _value_strings(new, new_rows)
+    moved_from, moved_to = assignment_mismatches(old, new)
+    return {
+        'added': np.setdiff1d(new.ids, old.ids),
+        'removed': np.setdiff1d(old.ids, new.ids),
+        'changed': common[changed],
+        'moved_from': moved_from,
+        'moved_to': moved_to,
+    }
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Compare two snapshots
+
+    Args:
+        old: Earlier snapshot
+        new: Later snapshot
+
+    Returns:
+        Per table, the differences found by diff_tables(); interfaces only
+        report 'added' and 'removed'
+    """
+    diff = {
+        'interfaces': {
+            'added': np.setdiff1d(new.interfaces.ids, old.interfaces.ids),
+            'removed': np.setdiff1d(old.interfaces.ids, new.interfaces.ids),
+        },
+        'ip_addresses': diff_tables(old.ip_addresses, new.ip_addresses),
+    }
+    if old.mac_addresses is not None and new.mac_addresses is not None:
+        diff['mac_addresses'] = diff_tables(old.mac_addresses, new.mac_addresses)
+    return diff
+
+
+def _interface_names(old: Snapshot, new: Snapshot, interface_ids: np.ndarray) -> List[str]:
+    """Names of interfaces from the new snapshot, or the old one if removed"""
+    return [name if not name.startswith('#') else old_name
+            for name, old_name in zip(new.interfaces.names_for(interface_ids),
+                                      old.interfaces.names_for(interface_ids))]
+
+
+def _print_info(path: str):
+    started = time.perf_counter()
+    snapshot = Snapshot.load(path)
+    elapsed = time.perf_counter() - started
+    print(f"{path}: loaded in {elapsed * 1000:.1f}ms")
+    for key, value in sorted(snapshot.meta.items()):
+        print(f"  {key}: {value}")
+    for name, table in snapshot._tables():
+        print(f"  {name}: {len(table)} rows")
+
+
+def _print_diff(old_path: str, new_path: str, limit: int):
+    old = Snapshot.load(old_path)
+    new = Snapshot.load(new_path)
+    print(f"Comparing {old_path} ({old.meta.get('netbox_version', '?')}) "
+          f"with {new_path} ({new.meta.get('netbox_version', '?')})")
+    for table, changes in diff_snapshots(old, new).items():
+        print()
+        print(f"{table}:")
+        for kind in ('added', 'removed', 'changed'):
+            if kind in changes:
+                ids = changes[kind]
+                shown = ", ".join(str(object_id) for object_id in ids[:limit])
+                more = f" (+{len(ids) - limit} more)" if len(ids) > limit else ""
+                print(f"  {kind}: {len(ids)}{': ' + shown + more if len(ids) else ''}")
+        for kind, label in (('moved_from', 'only in old'), ('moved_to', 'only in new')):
+            if kind in changes:
+                interface_ids, object_ids = changes[kind]
+                print(f"  assignments {label}: {len(object_ids)}")
+                shown = interface_ids[:limit]
+                for name, object_id in zip(_interface_names(old, new, shown), object_ids[:limit]):
+                    print(f"    ID {object_id} on {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and compare audit snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="show what a snapshot contains")
+    info.add_argument("path")
+    diff = commands.add_parser("diff", help="compare two snapshots")
+    diff.add_argument("old")
+    diff.add_argument("new")
+    diff.add_argument("--limit", type=int, default=20, help="IDs to list per difference")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        _print_info(args.path)
+    else:
+        _print_diff(args.old, args.new, args.limit)
@@ -0,0 +1,299 @@
+#!venv/bin/python
+
+"""Concurrent read/write stress test of paginated reads
+
+Runs paginated readers (NetBoxAPI and pynetbox) over a device's IP and MAC
+addresses while writers create, reassign and delete addresses of their own
+at a fixed rate, and reports how often a page repeats an object or a full
+pass misses one. Only the objects that existed before the writers started
+are checked: writers never touch them, so each of them must come back
+exactly once per pass however the rows around them change.
+
+Every combination of page size and write rate runs for --duration seconds:
+
+    ./stress.py --page-sizes 50,100,1000 --write-rates 0,10,50 > stress_output.txt
+    ./stress.py --fake --shuffle --readers 8
+
+Without --fake it runs against NETBOX_URL with NETBOX_TOKEN, which needs a
+token with write permission. Objects the writers create carry the
+description in STRESS_DESCRIPTION and are deleted at the end of each run.
+"""
+
+import argparse
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Set
+
+import pynetbox
+from dotenv import load_dotenv
+
+from fake_netbox import start_server
+from netbox import NetBoxAPI
+
+# Description of the objects created by the writers
+STRESS_DESCRIPTION = "pagination stress test"
+
+# Live objects a writer keeps before it starts reassigning and deleting them
+WRITER_POOL_SIZE = 20
+
+CLIENTS = ('raw', 'pynetbox')
+
+
+class StressStats:
+    """Counters shared by the reader or writer threads of one run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, key: str, **counts: int):
+        """Add counts under a key (a client name, or 'writes')"""
+        with self.lock:
+            totals = self.counts.setdefault(key, {})
+            for name, value in counts.items():
+                totals[name] = totals.get(name, 0) + value
+
+    def get(self, key: str) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.counts.get(key, {}))
+
+
+def check_pass(pages: List[List[int]], stable: Set[int]) -> Dict[str, int]:
+    """
+    Count the anomalies of one full pass over an endpoint
+
+    Args:
+        pages: IDs returned on each page, in page order
+        stable: IDs that existed throughout the pass and must each be
+            returned exactly once
+
+    Returns:
+        Counts of pages, pages repeating a stable ID from this or an
+        earlier page, stable IDs missing from the pass, and whether the
+        pass missed any
+    """
+    seen = set()
+    duplicated = 0
+    for page in pages:
+        page_ids = [object_id for object_id in page if object_id in stable]
+        if len(set(page_ids)) != len(page_ids) or not seen.isdisjoint(page_ids):
+            duplicated += 1
+        seen.update(page_ids)
+    missing = len(stable) - len(seen)
+    return {'pages': len(pages), 'duplicated_pages': duplicated, 'passes': 1,
+            'missing_ids': missing, 'missing_passes': int(missing > 0)}
+
+
+def read_pass_raw(nb: NetBoxAPI, endpoint: str, params: Dict) -> List[List[int]]:
+    """IDs on each page of one pass with NetBoxAPI, following 'next' links"""
+    return [[row['id'] for row in page]
+            for page in nb.iter_pages(endpoint, dict(params), output='dict')]
+
+
+def read_pass_pynetbox(nb: pynetbox.api, pages: List, endpoint: str, params: Dict) -> List[List[int]]:
+    """IDs on each page of one pass with pynetbox, recorded by a response hook"""
+    pages.clear()
+    app, name = endpoint.strip('/').split('/')
+    list(getattr(getattr(nb, app), name.replace('-', '_')).filter(**params))
+    return list(pages)
+
+
+def reader(url: str, token: str, client: str, endpoints: List[str], params: Dict,
+           stable: Dict[str, Set[int]], stats: StressStats, stop: threading.Event):
+    """Read every endpoint in turn until stopped, counting anomalies per client"""
+    if client == 'pynetbox':
+        nb = pynetbox.api(url, token=token)
+        pages = []
+        nb.http_session.hooks['response'].append(
+            lambda response, *args, **kwargs: pages.append(
+                [row['id'] for row in response.json().get('results', [])])
+            if response.request.method == 'GET' and response.ok else None
+        )
+        read_pass = lambda endpoint: read_pass_pynetbox(nb, pages, endpoint, params)
+    else:
+        nb = NetBoxAPI(url, token)
+        read_pass = lambda endpoint: read_pass_raw(nb, endpoint, params)
+
+    while not stop.is_set():
+        for endpoint in endpoints:
+            try:
+                stats.add(client, **check_pass(read_pass(endpoint), stable[endpoint]))
+            except Exception as e:
+                logging.warning("%s reader failed on %s: %s", client, endpoint, e)
+                stats.add(client, errors=1)
+            if stop.is_set():
+                break
+
+
+def _new_object(endpoint: str, interface_id: int) -> Dict:
+    """Payload of an IP or MAC address for a writer to create"""
+    number = random.getrandbits(24)
+    if endpoint == 'dcim/mac-addresses/':
+        value = {'mac_address': "02:00:" + ":".join(f"{(number >> shift) & 0xff:02X}"
+                                                    for shift in (24, 16, 8, 0))}
+    else:
+        value = {'address': f"10.{number >> 16}.{(number >> 8) & 0xff}.{number & 0xff}/32"}
+    return dict(value, assigned_object_type='dcim.interface', assigned_object_id=interface_id,
+                description=STRESS_DESCRIPTION)
+
+
+def writer(nb: NetBoxAPI, endpoints: List[str], interface_ids: List[int], rate: float,
+           pool: List, stats: StressStats, stop: threading.Event):
+    """
+    Create, reassign and delete IP and MAC addresses at a fixed rate
+
+    Args:
+        nb: API client
+        endpoints: Endpoints to write to
+        interface_ids: Interfaces to assign the objects to
+        rate: Writes per second of this writer
+        pool: (endpoint, id) of the live objects this writer created;
+            whatever is left is deleted by the caller
+        stats: Counters for 'writes'
+        stop: Set to stop writing
+    """
+    interval = 1.0 / rate
+    next_write = time.perf_counter()
+    while not stop.is_set():
+        delay = next_write - time.perf_counter()
+        if delay > 0 and stop.wait(delay):
+            break
+        # Fall behind rather than burst when a write took too long
+        next_write = max(next_write + interval, time.perf_counter() - interval)
+
+        choice = random.random()
+        try:
+            if len(pool) < WRITER_POOL_SIZE and choice < 0.5 or not pool:
+                endpoint = random.choice(endpoints)
+                created = nb.post(endpoint, _new_object(endpoint, random.choice(interface_ids)))
+                pool.append((endpoint, created.id))
+                stats.add('writes', writes=1, created=1)
+            elif choice < 0.75:
+                endpoint, object_id = random.choice(pool)
+                nb.patch(f"{endpoint}{object_id}/", {'assigned_object_id': random.choice(interface_ids)})
+                stats.add('writes', writes=1, reassigned=1)
+            else:
+                endpoint, object_id = pool.pop(random.randrange(len(pool)))
+                nb.delete(endpoint, [object_id])
+                stats.add('writes', writes=1, deleted=1)
+        except Exception as e:
+            logging.warning("Write failed: %s", e)
+            stats.add('writes', errors=1)
+
+
+def run(url: str, token: str, endpoints: List[str], device_id: int, page_size: int,
+        write_rate: float, readers: int, writers: int, clients: List[str],
+        duration: float, stable: Dict[str, Set[int]], interface_ids: List[int]) -> Dict:
+    """
+    Read and write concurrently for a while
+
+    Returns:
+        Elapsed seconds, per-client reader counts and the writer counts
+    """
+    stats = StressStats()
+    stop = threading.Event()
+    params = {'device_id': device_id, 'limit': page_size}
+    pools = [[] for _ in range(writers if write_rate > 0 else 0)]
+    threads = [threading.Thread(target=reader, args=(url, token, clients[index % len(clients)],
+                                                     endpoints, params, stable, stats, stop))
+               for index in range(readers)]
+    with NetBoxAPI(url, token, pool_maxsize=max(writers, 1)) as nb:
+        threads += [threading.Thread(target=writer, args=(nb, endpoints, interface_ids,
+                                                          write_rate / len(pools), pool, stats, stop))
+                    for pool in pools]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        stop.wait(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        for endpoint in endpoints:
+            leftovers = [object_id for pool in pools for pool_endpoint, object_id in pool
+                         if pool_endpoint == endpoint]
+            if leftovers:
+                nb.delete(endpoint, leftovers)
+
+    return {'elapsed': elapsed, 'clients': {client: stats.get(client) for client in clients},
+            'writes': stats.get('writes')}
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Measure pagination anomalies under concurrent writes")
+    parser.add_argument("--fake", action="store_true", help="run against an in-process fake NetBox")
+    parser.add_argument("--interfaces", type=int, default=2000, help="interfaces on the fake device")
+    parser.add_argument("--shuffle", action="store_true", help="non-deterministic fake server ordering")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake response")
+    parser.add_argument("--device-id", type=int, default=1, help="device whose addresses are read")
+    parser.add_argument("--page-sizes", default="50,100,1000", help="comma separated limits to test")
+    parser.add_argument("--write-rates", default="0,10,50", help="comma separated writes per second to test")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent readers")
+    parser.add_argument("--writers", type=int, default=4, help="concurrent writers sharing the write rate")
+    parser.add_argument("--clients", default=",".join(CLIENTS), help=f"reader clients, from: {', '.join(CLIENTS)}")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per page size and write rate")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("NETBOX_LOG_LEVEL", "WARNING").upper())
+    clients = [client.strip() for client in args.clients.split(",") if client.strip()]
+    unknown = [client for client in clients if client not in CLIENTS]
+    if unknown:
+        parser.error(f"unknown client(s): {', '.join(unknown)}")
+    page_sizes = [int(value) for value in args.page_sizes.split(",")]
+    write_rates = [float(value) for value in args.write_rates.split(",")]
+
+    server = None
+    if args.fake:
+        server, _ = start_server(interface_count=args.interfaces, shuffle=args.shuffle,
+                                 latency=args.latency)
+        url, token = server.url, "stress"
+    else:
+        url, token = os.getenv("NETBOX_URL"), os.getenv("NETBOX_TOKEN")
+
+    try:
+        with NetBoxAPI(url, token) as nb:
+            version = nb.status()["netbox_version"]
+            endpoints = ['ipam/ip-addresses/']
+            if tuple(int(part) for part in version.split('.')[:2]) >= (4, 2):
+                endpoints.append('dcim/mac-addresses/')
+            # Keyset pagination gives a consistent baseline while nothing is written
+            params = {'device_id': args.device_id, 'limit': 1000}
+            interface_ids = [row['id'] for row in nb.get('dcim/interfaces/', params, cursor=True, output='dict')]
+            stable = {endpoint: {row['id'] for row in nb.get(endpoint, params, cursor=True, output='dict')}
+                      for endpoint in endpoints}
+        if not interface_ids:
+            parser.error(f"device {args.device_id} has no interfaces")
+
+        print(f"NetBox {version} on {url}: device {args.device_id}, "
+              + ", ".join(f"{len(ids)} {endpoint}" for endpoint, ids in stable.items())
+              + f"; {args.readers} readers, {args.writers} writers, {args.duration:.0f}s per run")
+        print()
+        print(f"{'limit':>6} {'writes/s':>9} {'client':<10} {'pages/s':>8} {'writes':>7} {'pages':>7} "
+              f"{'dup pages':>10} {'passes':>7} {'missed':>8} {'missing/pass':>13} {'errors':>7} {'write errors':>13}")
+        for page_size in page_sizes:
+            for write_rate in write_rates:
+                result = run(url, token, endpoints, args.device_id, page_size, write_rate,
+                             args.readers, args.writers, clients, args.duration, stable, interface_ids)
+                elapsed = result['elapsed']
+                writes = result['writes']
+                for client, counts in result['clients'].items():
+                    pages = counts.get('pages', 0)
+                    passes = counts.get('passes', 0)
+                    print(f"{page_size:>6} {writes.get('writes', 0) / elapsed:>9.1f} {client:<10} "
+                          f"{pages / elapsed:>8.1f} {writes.get('writes', 0):>7} {pages:>7} "
+                          f"{counts.get('duplicated_pages', 0) / max(pages, 1):>9.2%} {passes:>7} "
+                          f"{counts.get('missing_passes', 0) / max(passes, 1):>7.1%} "
+                          f"{counts.get('missing_ids', 0) / max(passes, 1):>13.1f} "
+                          f"{counts.get('errors', 0):>7} {writes.get('errors', 0):>13}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!venv/bin/python
+
+"""Run every IPAM and MAC check from one fetch per client
+
+Fetches the interfaces, IP addresses and MAC addresses of a device once
+with each client (pynetbox and NetBoxAPI, both at the same time), runs the
+checks of test-ipam*.py and test-macs*.py on the fetched tables, and prints
+how long each client took to fetch (HTTP and JSON decoding), to build the
+audit tables from its objects and to check. NETBOX_PROFILE=1 also writes those phases, with CPU time and peak
+memory, to test_profile_all.json (see netbox.Profiler).
+
+    ./test-all.py > test_output.txt
+    ./test-all.py --device-id 2 --clients raw
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import pynetbox
+from dotenv import load_dotenv
+
+from audit import IPAM_AUDIT_FIELDS, AddressTable, InterfaceTable, ipam_report, mac_report
+from netbox import NetBoxAPI, Profiler, is_version_above
+
+CLIENTS = {
+    'raw': "NetBoxAPI",
+    'pynetbox': "pynetbox",
+}
+
+# Page size both clients request: pynetbox's default of 0 asks NetBox for
+# MAX_PAGE_SIZE, so requests and fetch times compare the clients, not pages
+PAGE_LIMIT = 0
+
+
+def fetch_raw(url: str, token: str, device_id: int, endpoints: List[str],
+              fields: Dict[str, List[str]], profiler: Profiler) -> Dict:
+    """Fetch every endpoint with NetBoxAPI, counting requests"""
+    requests = []
+    with NetBoxAPI(url, token, on_request=requests.append, profiler=profiler) as nb:
+        records = {endpoint: nb.get(endpoint, {'device_id': device_id, 'limit': PAGE_LIMIT},
+                                    fields=fields.get(endpoint), output='dict')
+                   for endpoint in endpoints}
+    return {'records': records, 'requests': len(requests)}
+
+
+def fetch_pynetbox(url: str, token: str, device_id: int, endpoints: List[str],
+                   fields: Dict[str, List[str]], profiler: Profiler) -> Dict:
+    """Fetch every endpoint with pynetbox, counting requests"""
+    requests = []
+    nb = pynetbox.api(url, token=token)
+    nb.http_session.hooks['response'].append(lambda response, *args, **kwargs: requests.append(response))
+    records = {}
+    for endpoint in endpoints:
+        app, name = endpoint.strip('/').split('/')
+        params = {'fields': ",".join(fields[endpoint])} if endpoint in fields else {}
+        with profiler.phase(f"pynetbox GET {endpoint}"):
+            records[endpoint] = list(getattr(getattr(nb, app), name.replace('-', '_')).filter(
+                device_id=device_id, limit=PAGE_LIMIT, **params))
+    return {'records': records, 'requests': len(requests)}
+
+
+FETCHERS = {
+    'raw': fetch_raw,
+    'pynetbox': fetch_pynetbox,
+}
+
+
+def audit(client: str, url: str, token: str, device_id: int, with_macs: bool,
+          fields: Dict[str, List[str]], profiler: Profiler) -> Dict:
+    """
+    Fetch a device's data with one client and run every check on it
+
+    Args:
+        client: Key of CLIENTS
+        url: NetBox URL
+        token: API token
+        device_id: Device ID
+        with_macs: Fetch and check MAC addresses (NetBox 4.2+)
+        fields: Fields to request per endpoint ({} for all fields)
+        profiler: Records the phases as '<client> fetch' etc.
+
+    Returns:
+        Report lines, request and object counts, and the seconds spent
+        fetching (including JSON decoding), building audit tables and checking
+    """
+    endpoints = ['dcim/interfaces/', 'ipam/ip-addresses/']
+    if with_macs:
+        endpoints.append('dcim/mac-addresses/')
+
+    started = time.perf_counter()
+    with profiler.phase(f"{client} fetch"):
+        fetched = FETCHERS[client](url, token, device_id, endpoints, fields, profiler)
+    records = fetched['records']
+    fetch_time = time.perf_counter() - started
+
+    # Both clients decode JSON while fetching; this is only table building
+    started = time.perf_counter()
+    with profiler.phase(f"{client} tables"):
+        interfaces = InterfaceTable.from_records(records['dcim/interfaces/'], with_macs=with_macs)
+        ips = AddressTable.from_records(records['ipam/ip-addresses/'], "address")
+        macs = AddressTable.from_records(records['dcim/mac-addresses/'], "mac_address") if with_macs else None
+    tables_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with profiler.phase(f"{client} check"):
+        lines = [f"Found {len(interfaces)} interfaces in NetBox for device {device_id}",
+                 f"Found {len(ips)} IP addresses in NetBox for device {device_id}"]
+        if macs is not None:
+            lines.append(f"Found {len(macs)} MAC addresses in NetBox for device {device_id}")
+        lines += ipam_report(interfaces, ips, macs)
+        if macs is not None:
+            lines += [""] + mac_report(interfaces, macs)
+    check_time = time.perf_counter() - started
+
+    return {
+        'lines': lines,
+        'requests': fetched['requests'],
+        'objects': sum(len(rows) for rows in records.values()),
+        'fetch': fetch_time,
+        'tables': tables_time,
+        'check': check_time,
+    }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run every IPAM and MAC check from one fetch per client")
+    parser.add_argument("--device-id", type=int, default=int(os.getenv("NETBOX_DEVICE_ID", 1)),
+                        help="device to audit (default NETBOX_DEVICE_ID or 1)")
+    parser.add_argument("--clients", default=",".join(CLIENTS), help=f"comma separated, from: {', '.join(CLIENTS)}")
+    args = parser.parse_args()
+
+    # Set NETBOX_LOG_LEVEL=DEBUG to trace every API request
+    logging.basicConfig(level=os.getenv("NETBOX_LOG_LEVEL", "WARNING").upper())
+    clients = [client.strip() for client in args.clients.split(",") if client.strip()]
+    unknown = [client for client in clients if client not in CLIENTS]
+    if unknown:
+        parser.error(f"unknown client(s): {', '.join(unknown)}")
+
+    url, token = os.getenv("NETBOX_URL"), os.getenv("NETBOX_TOKEN")
+    profiler = Profiler.from_env("test_profile_all.json")
+    with NetBoxAPI(url, token) as nb:
+        netbox_version = nb.status()["netbox_version"]
+    with_macs = is_version_above(netbox_version, "4.2.0")
+    # Only request the fields the checks read (?fields= needs NetBox 4.0+)
+    fields = IPAM_AUDIT_FIELDS if is_version_above(netbox_version, "4.0.0") else {}
+
+    # Clients fetch at the same time, each on its own connection pool
+    with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+        futures = {client: executor.submit(audit, client, url, token, args.device_id, with_macs, fields, profiler)
+                   for client in clients}
+        results = {client: future.result() for client, future in futures.items()}
+
+    print(f"NetBox {netbox_version}, device {args.device_id}")
+    for client, result in results.items():
+        print()
+        print(f"== {CLIENTS[client]} ==")
+        for line in result['lines']:
+            print(line)
+
+    print()
+    print(f"{'client':<12} {'requests':>8} {'objects':>8} {'fetch':>8} {'tables':>8} {'check':>8} {'total':>8}")
+    for client, result in results.items():
+        total = result['fetch'] + result['tables'] + result['check']
+        print(f"{CLIENTS[client]:<12} {result['requests']:>8} {result['objects']:>8} "
+              f"{result['fetch']:>7.2f}s {result['tables']:>7.2f}s {result['check']:>7.2f}s {total:>7.2f}s")
+
+    print()
+    print("Test complete")
+
+    profiler.meta.update(netbox_version=netbox_version, device_id=args.device_id, clients=clients)
+    profiler.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!venv/bin/python
+
+"""Check that BulkWriter never sends a bulk create twice
+
+Starts fake_netbox.FakeNetBoxServer with responses to writes held back
+past the client's timeout, so every chunk is committed but the client
+only sees a timeout. Retrying such a chunk would create its objects
+again: the duplicated addresses the IPAM tests look for, made by the
+seeding tool itself. The test creates a batch of IP addresses and checks
+that each exists exactly once. It then checks that updates are retried,
+since repeating a PATCH is harmless.
+
+    ./test-bulk-retry.py
+"""
+
+import argparse
+import logging
+import sys
+from collections import Counter
+
+from fake_netbox import start_server
+from netbox import BulkWriteError, BulkWriter, NetBoxAPI
+
+DESCRIPTION = "bulk retry test"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that BulkWriter does not duplicate timed out creates")
+    parser.add_argument("--objects", type=int, default=40, help="IP addresses to create")
+    parser.add_argument("--chunk-size", type=int, default=10, help="objects per request")
+    parser.add_argument("--timeout", type=float, default=0.2, help="client timeout in seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    server, _ = start_server(interface_count=10, write_latency=args.timeout * 3)
+    failures = []
+    try:
+        with NetBoxAPI(server.url, "test", timeout=args.timeout) as nb:
+            writer = BulkWriter(nb, chunk_size=args.chunk_size, max_retries=3, backoff_factor=0.01)
+            objects = [{'address': f"10.99.{i // 250}.{i % 250 + 1}/32", 'description': DESCRIPTION}
+                       for i in range(args.objects)]
+            try:
+                writer.create('ipam/ip-addresses/', objects)
+                failures.append("BUG: timed out creates were reported as successful")
+            except BulkWriteError as e:
+                print(f"Create: {len(e.errors)} chunk(s) timed out")
+
+            created = [obj for obj in server.data.objects['ipam/ip-addresses'].values()
+                       if obj.get('description') == DESCRIPTION]
+            duplicated = [address for address, count in Counter(obj['address'] for obj in created).items()
+                          if count > 1]
+            print(f"Created {len(created)} IP addresses for {len(objects)} requested")
+            if len(created) != len(objects) or duplicated:
+                failures.append(f"BUG: {len(created) - len(objects)} extra IP addresses, "
+                                f"{len(duplicated)} addresses created more than once")
+
+            # PATCH is idempotent, so a timed out update is retried
+            updates = [{'id': obj['id'], 'description': f"{DESCRIPTION} (updated)"} for obj in created]
+            try:
+                writer.update('ipam/ip-addresses/', updates)
+            except BulkWriteError:
+                pass
+            retries = writer.last_stats['retries'] + writer.last_stats['failed_chunks'] * writer.max_retries
+            print(f"Update: {retries} retries")
+            if not retries:
+                failures.append("BUG: timed out updates were not retried")
+    finally:
+        server.shutdown()
+
+    for failure in failures:
+        print(failure)
+    print()
+    print("Test complete")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!venv/bin/python
+
+"""Audit the IP and MAC addresses of many devices in parallel
+
+Lists devices, optionally filtered by site, role or tag, and audits each
+one on a pool of worker threads. A line is printed per device as soon as
+its audit finishes, and a summary at the end. Devices are read from the API
+a page at a time and only a few per worker are queued. Only the per-device
+counts are kept, so memory stays flat however large the fleet is.
+
+    ./test-fleet.py --site dummy-site --workers 16 > fleet_output.txt
+    ./test-fleet.py --role access-switch --tag production --expect-ips 2 --expect-macs 1
+
+Duplicated IDs, addresses assigned to interfaces the device did not return
+and MAC assignments that differ between dcim/mac-addresses/ and the
+interfaces are always reported. Interfaces with a different number of IP or
+MAC addresses are only reported when --expect-ips or --expect-macs is given,
+since real devices differ.
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from audit import (
+    IPAM_AUDIT_FIELDS,
+    AddressTable,
+    InterfaceTable,
+    cardinality_violations,
+    duplicate_ids,
+    embedded_cardinality_violations,
+    mac_assignment_mismatches,
+    unknown_assignments,
+)
+from netbox import AdaptiveConcurrency, NetBoxAPI, is_version_above
+
+# Issue counters of the summary, in report order
+ISSUES = ('duplicate_ids', 'unknown_assignments', 'ip_cardinality', 'mac_cardinality', 'mac_mismatches')
+
+# Devices queued per worker; bounds memory while keeping workers busy
+QUEUE_PER_WORKER = 2
+
+
+def bounded_map(executor: ThreadPoolExecutor, fn: Callable, items: Iterable,
+                window: int) -> Iterator[Tuple[object, Future]]:
+    """
+    Run fn on every item with at most window items submitted at a time
+
+    Args:
+        executor: Thread pool to run on
+        fn: Called with each item
+        items: Items, consumed lazily (e.g. a paginated generator)
+        window: Maximum submitted but unfinished items
+
+    Yields:
+        (item, finished future) in completion order
+    """
+    pending = {}
+    for item in items:
+        if len(pending) >= window:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future
+        pending[executor.submit(fn, item)] = item
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future
+
+
+def audit_device(nb: NetBoxAPI, device_id: int, with_macs: bool, fields: Dict[str, List[str]],
+                 expect_ips: Optional[int], expect_macs: Optional[int], details: int) -> Dict:
+    """
+    Fetch and check the interfaces, IP and MAC addresses of one device
+
+    Args:
+        nb: API client, shared by the workers
+        device_id: Device ID
+        with_macs: Fetch and check MAC addresses (NetBox 4.2+)
+        fields: Fields to request per endpoint ({} for all fields)
+        expect_ips: IP addresses every interface should have (None to skip)
+        expect_macs: MAC addresses every interface should have (None to skip)
+        details: 'BUG:' lines to keep, so a broken device costs no more memory
+
+    Returns:
+        Object counts, issue counts and the first details 'BUG:' lines
+    """
+    params = {'device_id': device_id, 'limit': 1000}
+    interfaces = InterfaceTable.from_records(
+        nb.iter_results('dcim/interfaces/', params, output='dict', fields=fields.get('dcim/interfaces/')),
+        with_macs=with_macs)
+    tables = [('IP address', AddressTable.from_records(
+        nb.iter_results('ipam/ip-addresses/', params, output='dict', fields=fields.get('ipam/ip-addresses/')),
+        'address'), expect_ips, 'ip_cardinality')]
+    if with_macs:
+        tables.append(('MAC address', AddressTable.from_records(
+            nb.iter_results('dcim/mac-addresses/', params, output='dict', fields=fields.get('dcim/mac-addresses/')),
+            'mac_address'), expect_macs, 'mac_cardinality'))
+
+    issues = dict.fromkeys(ISSUES, 0)
+    lines = []
+    duplicated, counts = duplicate_ids(interfaces.ids)
+    for interface_id, count in zip(duplicated, counts):
+        lines.append(f"BUG: Interface ID {interface_id} was returned {count} times")
+    issues['duplicate_ids'] += len(duplicated)
+
+    for label, table, expected, issue in tables:
+        duplicated, counts = duplicate_ids(table.ids)
+        for object_id, count in zip(duplicated, counts):
+            lines.append(f"BUG: {label} ID {object_id} was returned {count} times")
+        issues['duplicate_ids'] += len(duplicated)
+
+        # Filtered by device, so every assignment should be to one of its interfaces
+        for row in unknown_assignments(table, interfaces.ids):
+            lines.append(f"BUG: {label} ID {table.ids[row]} is assigned to interface ID "
+                         f"{table.object_ids[row]}, which the device did not return")
+            issues['unknown_assignments'] += 1
+
+        if expected is not None:
+            violating, counts = cardinality_violations(table, interfaces.ids, expected)
+            for name, count in zip(interfaces.names_for(violating), counts):
+                lines.append(f"BUG: Interface {name} has {count} {label}es (expected {expected})")
+            issues[issue] += len(violating)
+
+    if with_macs:
+        if expect_macs is not None:
+            violating, counts = embedded_cardinality_violations(interfaces, expect_macs)
+            for name, count in zip(interfaces.names_for(violating), counts):
+                lines.append(f"BUG: Interface {name} lists {count} MAC addresses (expected {expect_macs})")
+            issues['mac_cardinality'] += len(violating)
+
+        macs = tables[1][1]
+        (only_mac_interfaces, only_mac_ids), (only_interface_interfaces, only_interface_mac_ids) = \
+            mac_assignment_mismatches(macs, interfaces)
+        for name, mac_id in zip(interfaces.names_for(only_mac_interfaces), only_mac_ids):
+            lines.append(f"BUG: MAC address ID {mac_id} is assigned to {name} but not listed on it")
+        for name, mac_id in zip(interfaces.names_for(only_interface_interfaces), only_interface_mac_ids):
+            lines.append(f"BUG: MAC address ID {mac_id} is listed on {name} but not assigned to it")
+        issues['mac_mismatches'] += len(only_mac_ids) + len(only_interface_mac_ids)
+
+    return {
+        'interfaces': len(interfaces),
+        'ip_addresses': len(tables[0][1]),
+        'mac_addresses': len(tables[1][1]) if with_macs else 0,
+        'issues': issues,
+        'lines': lines[:details],
+    }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Audit IP and MAC addresses of many devices in parallel")
+    parser.add_argument("--site", action="append", help="only devices at this site (slug, repeatable)")
+    parser.add_argument("--role", action="append", help="only devices with this role (slug, repeatable)")
+    parser.add_argument("--tag", action="append", help="only devices with this tag (slug, repeatable)")
+    parser.add_argument("--workers", type=int, default=8, help="devices audited at the same time")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="adapt the requests in flight to NetBox's load, up to --workers")
+    parser.add_argument("--expect-ips", type=int, help="IP addresses every interface should have")
+    parser.add_argument("--expect-macs", type=int, help="MAC addresses every interface should have")
+    parser.add_argument("--details", type=int, default=10, help="BUG lines to print per device")
+    args = parser.parse_args()
+
+    # Set NETBOX_LOG_LEVEL=DEBUG to trace every API request
+    logging.basicConfig(level=os.getenv("NETBOX_LOG_LEVEL", "WARNING").upper())
+
+    concurrency = AdaptiveConcurrency(initial=min(4, args.workers), maximum=args.workers) if args.adaptive else None
+    nb = NetBoxAPI(os.getenv("NETBOX_URL"), os.getenv("NETBOX_TOKEN"),
+                   pool_maxsize=args.workers + 1, concurrency=concurrency)
+    netbox_version = nb.status()["netbox_version"]
+    with_macs = is_version_above(netbox_version, "4.2.0")
+    # Only request the fields the checks read (?fields= needs NetBox 4.0+)
+    fields = IPAM_AUDIT_FIELDS if is_version_above(netbox_version, "4.0.0") else {}
+
+    filters = {'site': args.site, 'role': args.role, 'tag': args.tag}
+    params = {key: values for key, values in filters.items() if values}
+    params['limit'] = 1000
+    devices = nb.iter_results('dcim/devices/', params, output='dict',
+                              fields=['id', 'name'] if fields else None)
+    print(f"NetBox {netbox_version}: auditing devices"
+          + "".join(f" {key}={','.join(values)}" for key, values in filters.items() if values)
+          + f" with {args.workers} workers")
+    print()
+
+    totals = dict.fromkeys(ISSUES, 0)
+    audited = failed = with_issues = 0
+    objects = np.zeros(3, dtype=np.int64)
+    started = time.perf_counter()
+    audit = lambda device: audit_device(nb, device['id'], with_macs, fields, args.expect_ips, args.expect_macs,
+                                        args.details)
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for device, future in bounded_map(executor, audit, devices, args.workers * QUEUE_PER_WORKER):
+            name = f"{device.get('name') or 'unnamed'} (ID {device['id']})"
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"ERROR: {name}: {e}", flush=True)
+                continue
+            audited += 1
+            objects += (result['interfaces'], result['ip_addresses'], result['mac_addresses'])
+            count = sum(result['issues'].values())
+            for issue, value in result['issues'].items():
+                totals[issue] += value
+            summary = (f"{name}: {result['interfaces']} interfaces, {result['ip_addresses']} IP addresses"
+                       + (f", {result['mac_addresses']} MAC addresses" if with_macs else ""))
+            if not count:
+                print(f"{summary}: OK", flush=True)
+                continue
+            with_issues += 1
+            print(f"{summary}: {count} issues", flush=True)
+            for line in result['lines']:
+                print(f"  {line}")
+            if count > len(result['lines']):
+                print(f"  ... {count - len(result['lines'])} more")
+    elapsed = time.perf_counter() - started
+    nb.close()
+
+    print()
+    print(f"Audited {audited} devices in {elapsed:.1f}s ({audited / elapsed if elapsed else 0:.1f} devices/s), "
+          f"{failed} failed")
+    print(f"Fetched {objects[0]} interfaces, {objects[1]} IP addresses"
+          + (f", {objects[2]} MAC addresses" if with_macs else ""))
+    print(f"Devices with issues: {with_issues}")
+    for issue in ISSUES:
+        print(f"  {issue.replace('_', ' ')}: {totals[issue]}")
+    if concurrency is not None:
+        print(f"Adaptive concurrency: limit {int(concurrency.limit)}, {concurrency.stats}")
+    print()
+    print("Test complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!venv/bin/python
+
+from dotenv import load_dotenv
+import logging
+import os
+from audit import (
+    IPAM_AUDIT_FIELDS,
+    AddressTable,
+    InterfaceTable,
+    assigned_objects,
+    assignment_mismatches,
+    cardinality_violations,
+)
+from netbox import NetBoxAPI, is_version_above
+
+load_dotenv()
+
+# Set NETBOX_LOG_LEVEL=DEBUG to trace every API request
+logging.basicConfig(level=os.getenv("NETBOX_LOG_LEVEL", "WARNING").upper())
+
+# Count requests per source to compare the cost of both paths
+request_counts = {"graphql": 0, "rest": 0}
+def count_request(event):
+    request_counts["graphql" if "/graphql/" in event.url else "rest"] += 1
+
+nb = NetBoxAPI(
+    url=os.getenv("NETBOX_URL"),
+    token=os.getenv("NETBOX_TOKEN"),
+    on_request=count_request,
+)
+
+DEVICE_ID = int(os.getenv("NETBOX_DEVICE_ID", 1))
+
+status = nb.status()
+netbox_version = status["netbox_version"]
+with_macs = is_version_above(netbox_version, "4.2.0")
+
+# One nested GraphQL query per page: interfaces with their IPs and MACs
+graphql_interfaces = nb.get_device_interfaces(DEVICE_ID, with_macs=with_macs)
+graphql_requests = request_counts["graphql"]
+
+# The same data from the REST endpoints, one paginated pull each
+fields = IPAM_AUDIT_FIELDS if is_version_above(netbox_version, "4.0.0") else {}
+rest_ips = nb.get(f"ipam/ip-addresses/?device_id={DEVICE_ID}", fields=fields.get("ipam/ip-addresses/"))
+rest_macs = None
+if with_macs:
+    rest_macs = nb.get(f"dcim/mac-addresses/?device_id={DEVICE_ID}", fields=fields.get("dcim/mac-addresses/"))
+rest_requests = request_counts["rest"] - 1  # not counting the status request
+
+print(f"Found {len(graphql_interfaces)} interfaces in NetBox for device {DEVICE_ID} with GraphQL in {graphql_requests} requests")
+print(f"Found {len(rest_ips)} IP addresses" + (f" and {len(rest_macs)} MAC addresses" if rest_macs is not None else "")
+      + f" in NetBox for device {DEVICE_ID} with REST in {rest_requests} requests")
+
+interfaces = InterfaceTable.from_records(graphql_interfaces, with_macs=with_macs)
+sources = [("IP address", AddressTable.from_interfaces(graphql_interfaces, "ip_addresses", "address"),
+            AddressTable.from_records(rest_ips, "address"), 2)]
+if with_macs:
+    sources.append(("MAC address", AddressTable.from_interfaces(graphql_interfaces, "mac_addresses", "mac_address"),
+                    AddressTable.from_records(rest_macs, "mac_address"), 1))
+
+for label, graphql_table, rest_table, expected in sources:
+    graphql_objects, graphql_counts = assigned_objects(graphql_table)
+    rest_objects, rest_counts = assigned_objects(rest_table)
+    print()
+    print(f"GraphQL: {graphql_counts.sum()} {label}es on {len(graphql_objects)} interfaces")
+    print(f"REST: {rest_counts.sum()} {label}es on {len(rest_objects)} interfaces")
+
+    # Each interface should have exactly the expected number of addresses in both sources
+    for source, table in (("GraphQL", graphql_table), ("REST", rest_table)):
+        wrong_interfaces, wrong_counts = cardinality_violations(table, interfaces.ids, expected)
+        for name, count in zip(interfaces.names_for(wrong_interfaces), wrong_counts):
+            print(f"BUG: Interface {name} has {count} {label}es from {source} (expected {expected})")
+
+    # Compare the individual (interface, address) assignments reported by both sources
+    (only_graphql_interfaces, only_graphql_ids), (only_rest_interfaces, only_rest_ids) = \
+        assignment_mismatches(graphql_table, rest_table)
+    for name, object_id in zip(interfaces.names_for(only_graphql_interfaces), only_graphql_ids):
+        print(f"BUG: {label} ID {object_id} is on {name} according to GraphQL but not according to REST")
+    for name, object_id in zip(interfaces.names_for(only_rest_interfaces), only_rest_ids):
+        print(f"BUG: {label} ID {object_id} is on {name} according to REST but not according to GraphQL")
+
+print()
+print("Test complete")
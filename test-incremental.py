@@ -0,0 +1,104 @@
+#!venv/bin/python
+
+"""Check that refreshing a snapshot gives the same tables as a full fetch
+
+Starts fake_netbox.FakeNetBoxServer and makes full fetches of a device the
+way test-ipam-raw.py does, changes the device's addresses and refreshes the
+snapshots with incremental.refresh_snapshot(). Each refreshed snapshot has
+to match a new full fetch. The refreshes covered are the ones that cannot
+trust the changelog: a snapshot fetched without a changelog, so it has no
+watermark, whose deletions have since aged out of the changelog; and a
+snapshot with a watermark whose changelog endpoint cannot be read.
+
+    ./test-incremental.py
+"""
+
+import argparse
+import logging
+import sys
+from typing import List
+
+from audit import IPAM_AUDIT_FIELDS
+from fake_netbox import DEVICE_ID, start_server
+from incremental import CHANGELOG_ENDPOINT, fetch_snapshot, refresh_snapshot
+from netbox import NetBoxAPI
+from snapshot import Snapshot, diff_snapshots
+
+
+def differences(refreshed: Snapshot, expected: Snapshot) -> List[str]:
+    """Describe how a refreshed snapshot differs from a full fetch"""
+    lines = []
+    for name, changes in diff_snapshots(expected, refreshed).items():
+        for kind, values in changes.items():
+            # moved_from and moved_to are (interface IDs, object IDs) pairs
+            ids = values[1] if isinstance(values, tuple) else values
+            if len(ids):
+                lines.append(f"{len(ids)} {name.replace('_', ' ')} {kind.replace('_', ' ')}")
+    return lines
+
+
+def change_addresses(server, count: int):
+    """Delete, reassign and create count IP addresses of the device"""
+    data = server.data
+    addresses = sorted(data.objects['ipam/ip-addresses'])
+    interfaces = sorted(data.objects['dcim/interfaces'])
+    for object_id in addresses[:count]:
+        data.delete('ipam/ip-addresses', object_id)
+    for object_id in addresses[count:2 * count]:
+        data.update('ipam/ip-addresses', object_id, assigned_object_id=interfaces[-1])
+    for index in range(count):
+        data.create('ipam/ip-addresses', address=f"10.98.0.{index + 1}/32", assigned_object_id=interfaces[0])
+    if data.with_macs:
+        data.delete('dcim/mac-addresses', sorted(data.objects['dcim/mac-addresses'])[0])
+
+
+def check(nb: NetBoxAPI, label: str, snapshot: Snapshot, changelog_endpoint: str, failures: List[str]):
+    """Refresh a snapshot and compare it with a full fetch"""
+    with_macs = snapshot.mac_addresses is not None
+    refreshed, stats = refresh_snapshot(nb, snapshot, IPAM_AUDIT_FIELDS, changelog_endpoint)
+    expected = fetch_snapshot(nb, DEVICE_ID, with_macs, IPAM_AUDIT_FIELDS, None)
+    print(f"{label}: " + ", ".join(f"{change['fetched']} {name.replace('_', ' ')} fetched, "
+                                   f"{change['removed']} removed" for name, change in stats.items()))
+    for line in differences(refreshed, expected):
+        failures.append(f"BUG: {label}: {line} compared with a full fetch")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check incremental refreshes against full fetches")
+    parser.add_argument("--interfaces", type=int, default=50, help="interfaces on the device")
+    parser.add_argument("--changes", type=int, default=5, help="IP addresses deleted, reassigned and created")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    server, _ = start_server(interface_count=args.interfaces)
+    failures = []
+    try:
+        with NetBoxAPI(server.url, "test") as nb:
+            # Fetched with the changelog disabled, as test-ipam-raw.py does without NETBOX_SNAPSHOT
+            snapshot = fetch_snapshot(nb, DEVICE_ID, True, IPAM_AUDIT_FIELDS, None)
+            if snapshot.meta['watermark'] is not None:
+                failures.append("BUG: a fetch without a changelog endpoint has a watermark")
+            change_addresses(server, args.changes)
+            # The deletions are older than the changelog's retention
+            server.data.objects['core/object-changes'].clear()
+            check(nb, "Refresh without a watermark", snapshot, CHANGELOG_ENDPOINT, failures)
+
+            # Log a change so the next fetch has a watermark
+            change_addresses(server, args.changes)
+            snapshot = fetch_snapshot(nb, DEVICE_ID, True, IPAM_AUDIT_FIELDS, CHANGELOG_ENDPOINT)
+            if snapshot.meta['watermark'] is None:
+                failures.append("BUG: a fetch with a changelog has no watermark")
+            change_addresses(server, args.changes)
+            check(nb, "Refresh with an unreadable changelog", snapshot, 'extras/nope/', failures)
+    finally:
+        server.shutdown()
+
+    for failure in failures:
+        print(failure)
+    print()
+    print("Test complete")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
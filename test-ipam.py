@@ -3,6 +3,9 @@
 from dotenv import load_dotenv
 import os
 import pynetbox
+from audit import IPAM_AUDIT_FIELDS, AddressTable, InterfaceTable, ipam_report
+from netbox import Profiler, is_version_above
+from snapshot import Snapshot
 
 load_dotenv()
 
@@ -11,34 +14,34 @@ nb = pynetbox.api(
     token=os.getenv("NETBOX_TOKEN")
 )
 
-# Function to check if NetBox version is above a specified version
-def is_version_above(current_version, min_version):
-    current_parts = [int(x) for x in current_version.split('.')]
-    min_parts = [int(x) for x in min_version.split('.')]
-    
-    for i in range(max(len(current_parts), len(min_parts))):
-        current = current_parts[i] if i < len(current_parts) else 0
-        minimum = min_parts[i] if i < len(min_parts) else 0
-        if current > minimum:
-            return True
-        elif current < minimum:
-            return False
-    return True
+DEVICE_ID = int(os.getenv("NETBOX_DEVICE_ID", 1))
+
+# Set NETBOX_PROFILE=1 (or a report path) to profile the fetch, tables and check phases
+profiler = Profiler.from_env()
 
 status = nb.status()
 netbox_version = status["netbox-version"]
 
 all_netbox_macs = None
 
-all_netbox_interfaces = list(nb.dcim.interfaces.filter(device_id=1))
-all_netbox_ips = list(nb.ipam.ip_addresses.filter(device_id=1))
+# Only request the fields the audit reads (?fields= needs NetBox 4.0+)
+def audit_fields(endpoint):
+    if not is_version_above(netbox_version, "4.0.0"):
+        return {}
+    return {"fields": ",".join(IPAM_AUDIT_FIELDS[endpoint])}
+
+with profiler.phase("GET dcim/interfaces/"):
+    all_netbox_interfaces = list(nb.dcim.interfaces.filter(device_id=DEVICE_ID, **audit_fields("dcim/interfaces/")))
+with profiler.phase("GET ipam/ip-addresses/"):
+    all_netbox_ips = list(nb.ipam.ip_addresses.filter(device_id=DEVICE_ID, **audit_fields("ipam/ip-addresses/")))
 if is_version_above(netbox_version, "4.2.0"):
-    all_netbox_macs = list(nb.dcim.mac_addresses.filter(device_id=1))
+    with profiler.phase("GET dcim/mac-addresses/"):
+        all_netbox_macs = list(nb.dcim.mac_addresses.filter(device_id=DEVICE_ID, **audit_fields("dcim/mac-addresses/")))
 
-print(f"Found {len(all_netbox_interfaces)} interfaces in NetBox for device 1")
-print(f"Found {len(all_netbox_ips)} IP addresses in NetBox for device 1")
+print(f"Found {len(all_netbox_interfaces)} interfaces in NetBox for device {DEVICE_ID}")
+print(f"Found {len(all_netbox_ips)} IP addresses in NetBox for device {DEVICE_ID}")
 if all_netbox_macs:
-    print(f"Found {len(all_netbox_macs)} MAC addresses in NetBox for device 1")
+    print(f"Found {len(all_netbox_macs)} MAC addresses in NetBox for device {DEVICE_ID}")
 
 # This was initially how I found the problem, interfaces missing IPs, some showing too many, double ups etc.
 # for ip in all_netbox_ips:
@@ -49,61 +52,30 @@ if all_netbox_macs:
 #         print(ip.id, ip.address, ip.assigned_object.name)
 
 # So, I looped through all the IP addresses and grouped them by the interface they are assigned to, knowing that all interfaces should have 2 IP addresses, log if differs
-interface_ips = {}
-interface_macs = {}
-
-for ip in all_netbox_ips:
-    if ip.assigned_object and ip.assigned_object.name:
-        if not interface_ips.get(ip.assigned_object.name):
-            interface_ips[ip.assigned_object.name] = []
-        interface_ips[ip.assigned_object.name].append(ip)
-
-if all_netbox_macs:
-    for mac in all_netbox_macs:
-        if mac.assigned_object and mac.assigned_object.name:
-            if not interface_macs.get(mac.assigned_object.name):
-                interface_macs[mac.assigned_object.name] = []
-            interface_macs[mac.assigned_object.name].append(mac)
-
-# print length of interface_ips and accumaltive length of its ips
-print(f"Found {len(interface_ips)} interfaces with {sum(len(ips) for ips in interface_ips.values())} IP addresses")
-if all_netbox_macs:
-    print(f"Found {len(interface_macs)} interfaces with {sum(len(macs) for macs in interface_macs.values())} MAC addresses")
-print()
-print("Each interface should have exactly two addresses")
-print("- 172.17.0.1/32")
-print("- ff1d:c7c:7b44:d39d:ab3d:6fde:f46a:4648/64")
-print()
-if all_netbox_macs:
-    print("Each interface should have exactly one MAC address")
-    print("- 18:2A:D3:65:90:2E")
-    print()
-
-for interface, ips in interface_ips.items():
-    if len(ips) != 2:
-        print(f"BUG: Interface {interface} has {len(ips)} IP addresses")
-        for ip in ips:
-            print(f"IP {ip.address} (ID: {ip.id}) is assigned to {ip.assigned_object.name}")
-
-print()
-
-if all_netbox_macs:
-    for interface, macs in interface_macs.items():
-        if len(macs) != 1:
-            print(f"BUG: Interface {interface} has {len(macs)} MAC addresses")
-            for mac in macs:
-                print(f"MAC {mac.mac_address} (ID: {mac.id}) is assigned to {mac.assigned_object.name}")
-
-    print()
-
-    for interface in all_netbox_interfaces:
-        if len(interface.mac_addresses) != 1:
-            print(f"BUG: Interface {interface.name} has {len(interface.mac_addresses)} MAC addresses")
-            for mac in interface.mac_addresses:
-                print(f"MAC {mac.mac_address} (ID: {mac.id}) is assigned to {interface.name}")
+# The grouping now runs on columnar arrays keyed by interface ID (see audit.py)
+# pynetbox decodes JSON while fetching; this is only table building
+with profiler.phase("tables"):
+    interfaces = InterfaceTable.from_records(all_netbox_interfaces, with_macs=all_netbox_macs is not None)
+    ips = AddressTable.from_records(all_netbox_ips, "address")
+    macs = AddressTable.from_records(all_netbox_macs, "mac_address") if all_netbox_macs else None
+
+# Keep the fetched tables for offline diffs across runs and versions (see snapshot.py)
+if os.getenv("NETBOX_SNAPSHOT"):
+    with profiler.phase("save snapshot"):
+        Snapshot(interfaces, ips, macs, {
+            "netbox_version": netbox_version,
+            "device_id": DEVICE_ID,
+            "client": "pynetbox",
+        }).save(os.getenv("NETBOX_SNAPSHOT"))
+
+# print number of interfaces with IPs and accumulated number of their IPs, then every inconsistency found
+with profiler.phase("check"):
+    report = ipam_report(interfaces, ips, macs)
+for line in report:
+    print(line)
 
 print()
 print("Test complete")
 
-
-
+profiler.meta.update(netbox_version=netbox_version, client="pynetbox", device_id=DEVICE_ID)
+profiler.save()
@@ -3,6 +3,7 @@
 from dotenv import load_dotenv
 import os
 import pynetbox
+from audit import MAC_AUDIT_FIELDS, AddressTable, InterfaceTable, mac_report
 
 load_dotenv()
 
@@ -12,47 +13,22 @@ nb = pynetbox.api(
     threading=True
 )
 
-DEVICE_ID = 1
+DEVICE_ID = int(os.getenv("NETBOX_DEVICE_ID", 1))
 
-all_netbox_macs = list(nb.dcim.mac_addresses.filter(device_id=DEVICE_ID))
-all_netbox_interfaces = list(nb.dcim.interfaces.filter(device_id=DEVICE_ID))
+# Only request the fields the audit reads
+all_netbox_macs = list(nb.dcim.mac_addresses.filter(device_id=DEVICE_ID, fields=",".join(MAC_AUDIT_FIELDS["dcim/mac-addresses/"])))
+all_netbox_interfaces = list(nb.dcim.interfaces.filter(device_id=DEVICE_ID, fields=",".join(MAC_AUDIT_FIELDS["dcim/interfaces/"])))
 
 print(f"Found {len(all_netbox_macs)} MAC addresses in NetBox for device {DEVICE_ID} from dcim.mac_addresses endpoint.")
 print(f"Found {len(all_netbox_interfaces)} interfaces in NetBox for device {DEVICE_ID} from dcim.interfaces endpoint.")
 
-mac_interfaces = {}
-interface_macs = {}
+# Group MAC addresses by interface on columnar arrays keyed by interface ID (see audit.py)
+macs = AddressTable.from_records(all_netbox_macs, "mac_address")
+interfaces = InterfaceTable.from_records(all_netbox_interfaces)
 
-for mac in all_netbox_macs:
-    if mac.assigned_object and mac.assigned_object.name:
-        if not mac_interfaces.get(mac.assigned_object.name):
-            mac_interfaces[mac.assigned_object.name] = []
-        mac_interfaces[mac.assigned_object.name].append(mac)
-
-total_macs = sum(len(macs) for macs in mac_interfaces.values())
-print(f"Found {total_macs} MAC addresses on {len(mac_interfaces)} interfaces with from dcim.mac_addresses endpoint.")
-
-for interface in all_netbox_interfaces:
-    if interface.mac_addresses:
-        if not interface_macs.get(interface.name):
-            interface_macs[interface.name] = []
-        for mac in interface.mac_addresses:
-            interface_macs[interface.name].append(mac)
-
-total_macs_from_interface = sum(len(macs) for macs in interface_macs.values())
-print(f"Found {total_macs_from_interface} MAC addresses on {len(interface_macs)} interfaces from dcim.interfaces endpoint.")
-
-# Expose bug in mac / interface counts returned from different endpoints
-
-# total_macs is the total number of MAC addresses on the device from the dcim.mac_addresses endpoint
-# total_macs_from_interface is the total number of MAC addresses on all interfaces from the dcim.interfaces endpoint
-if total_macs != total_macs_from_interface:
-    print(f"BUG: Total MAC addresses from dcim.mac_addresses endpoint ({total_macs}) does not match total MAC addresses from dcim.interfaces endpoint ({total_macs_from_interface})")
-
-# mac_interfaces[mac.assigned_object.name] -> list of MAC addresses from the dcim.mac_addresses endpoint
-# interface_macs[interface.name] -> list of MAC addresses from the dcim.interfaces endpoint
-if len(mac_interfaces) != len(interface_macs):
-    print(f"BUG: Total interfaces from dcim.mac_addresses endpoint ({len(mac_interfaces)}) does not match total interfaces from dcim.interfaces endpoint ({len(interface_macs)})")
+# Compare the MAC addresses and assignments reported by both endpoints
+for line in mac_report(interfaces, macs):
+    print(line)
 
 print()
 print("Test complete")